@@ -1,8 +1,30 @@
-"""Custom Binance trading library."""
-
-import binancetrading.command_line as command_line
-import binancetrading.strategies as strategies
-from binancetrading.account import Account, enable_logging
-from binancetrading.backtest import Backtest
-from binancetrading.exchange import Exchange
-from binancetrading.trading_bot import TradingBot
+"""Custom Binance trading library.
+
+Submodules and classes are imported on first use, so headless bots importing TradingBot
+do not pay for plotting, backtesting or command line parsing."""
+
+import importlib
+
+_CLASSES = {
+    'Account': 'binancetrading.account',
+    'enable_logging': 'binancetrading.account',
+    'Backtest': 'binancetrading.backtest',
+    'BacktestCache': 'binancetrading.cache',
+    'Exchange': 'binancetrading.exchange',
+    'TradingBot': 'binancetrading.trading_bot',
+}
+_MODULES = ['command_line', 'fills', 'matching', 'robustness', 'strategies']
+
+__all__ = list(_CLASSES) + _MODULES
+
+
+def __getattr__(name: str):
+    if name in _CLASSES:
+        return getattr(importlib.import_module(_CLASSES[name]), name)
+    if name in _MODULES:
+        return importlib.import_module(f'binancetrading.{name}')
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + __all__)
@@ -4,11 +4,14 @@
 import logging
 import time
 from dataclasses import dataclass
+from typing import Optional
 
 import pandas as pd
 from binance.spot import Spot
 from binance.lib.utils import config_logging
 
+from binancetrading.scheduler import DEFAULT_SCHEDULER, RequestScheduler
+
 LOG = False
 
 # Disable binance loggers
@@ -31,8 +34,8 @@ def log_msg(msg: str, verb: bool = False) -> None:
 
 
 @dataclass
-class Account:
-    """Account class."""
+class BaseAccount:
+    """Settings, positions and trade journal shared by the synchronous and asyncio accounts, without a REST client."""
 
     api: str
     secret: str
@@ -41,9 +44,10 @@ class Account:
     paper_cash_position: float = 1000
     use_real_balance_as_paper: bool = False
     apiurl: str = 'https://api.binance.com'
+    scheduler: Optional[RequestScheduler] = None
 
     def __post_init__(self) -> None:
-        self.client = Spot(key=self.api, secret=self.secret, base_url=self.apiurl)
+        self.scheduler = self.scheduler or DEFAULT_SCHEDULER
         self.commissions: float = 0.0
         self.init_wealth: float = 0.0
         self.wealth: float = 0.0
@@ -54,32 +58,6 @@ class Account:
 
         log_msg(f'Started at: {time.strftime("%Y-%m-%d %H-%M", time.localtime())}')
 
-    def account_balances(self) -> pd.DataFrame:
-        """Get current account balances from binance."""
-        acc_df = pd.DataFrame(self.client.account()['balances'])
-        acc_df[['free', 'locked']] = acc_df[['free', 'locked']].astype(float)
-        acc_df.columns = ['Asset', 'Free', 'Locked']
-        acc_df = acc_df.loc[(acc_df['Free'] != 0.0) | (acc_df['Locked'] != 0.0)].reset_index()
-        return acc_df[['Asset', 'Free', 'Locked']]
-
-    def get_coin_balance(self, coin: str) -> float:
-        """Get balance of specific coin."""
-        acc_df = self.account_balances()
-        try:
-            balance = float(acc_df.loc[acc_df['Asset'] == coin, 'Free'])
-        except TypeError:
-            balance = 0
-        return balance
-
-    def _set_positions(self, coin: str, position: float, cash_position: float) -> None:
-        """Initialize local portfolio to track orders and current positions."""
-        if self.paper_trade and not self.use_real_balance_as_paper:
-            self.position = position
-            self.cash_position = cash_position
-        else:
-            self.position = self.get_coin_balance(coin)
-            self.cash_position = self.get_coin_balance('USDT')
-
     def _refresh_positions(self, side, price, qty, commission) -> None:
         """Given an order, modify positions accordingly."""
         if side == 'BUY':
@@ -91,18 +69,16 @@ class Account:
             self.cash_position += qty * price
             self.commissions += qty * price * commission
 
-    def _value_positions(self, symbol: str, init: bool = False, verbose: bool = True) -> None:
-        """Value current positions."""
-        price = float(self.client.ticker_price(symbol)['price'])
+    def _set_wealth(self, symbol: str, price: float, init: bool = False, verbose: bool = True) -> None:
+        """Value current positions at price."""
         self.wealth = self.cash_position + price * self.position - self.commissions
         if init:
             self.init_wealth = self.wealth
         if verbose:
             log_msg(f'{symbol} position: {self.position:,.4f}\nCash position: {self.cash_position:,.2f}\nCommissions: {self.commissions:,.2f}\nTotal: {self.wealth:,.2f}', verb=True)
 
-    def _check_profit_loss(self, symbol: str, profit: float, loss: float) -> tuple[bool, str]:
-        """Check profit and loss targets, return boolean flag if they are met."""
-        self._value_positions(symbol, verbose=False)
+    def _profit_loss_met(self, profit: float, loss: float) -> tuple[bool, str]:
+        """Check current wealth against profit and loss targets, return boolean flag if they are met."""
         current_return = (self.wealth / self.init_wealth - 1) * 100
         log_msg(f'Current return: {current_return:.4f}%')
         if current_return > profit:
@@ -112,3 +88,59 @@ class Account:
             log_msg(f'Stop loss met at {current_return:.4f}%, exiting program.', verb=True)
             return True, 'Loss'
         return False, ''
+
+
+@dataclass
+class Account(BaseAccount):
+    """Account class."""
+
+    def __post_init__(self) -> None:
+        super().__post_init__()
+        self.client = Spot(key=self.api, secret=self.secret, base_url=self.apiurl)
+
+    def account_balances(self) -> pd.DataFrame:
+        """Get current account balances from binance."""
+        return _balances_df(self.scheduler.call(self.client.account)['balances'])
+
+    def get_coin_balances(self, *coins: str) -> dict[str, float]:
+        """Get free balance of several coins with a single request."""
+        return _free_balances(self.scheduler.call(self.client.account)['balances'], coins)
+
+    def get_coin_balance(self, coin: str) -> float:
+        """Get balance of specific coin."""
+        return self.get_coin_balances(coin)[coin]
+
+    def _set_positions(self, coin: str, position: float, cash_position: float) -> None:
+        """Initialize local portfolio to track orders and current positions."""
+        if self.paper_trade and not self.use_real_balance_as_paper:
+            self.position = position
+            self.cash_position = cash_position
+        else:
+            balances = self.get_coin_balances(coin, 'USDT')
+            self.position = balances[coin]
+            self.cash_position = balances['USDT']
+
+    def _value_positions(self, symbol: str, init: bool = False, verbose: bool = True) -> None:
+        """Value current positions."""
+        price = float(self.scheduler.call(self.client.ticker_price, symbol)['price'])
+        self._set_wealth(symbol, price, init, verbose)
+
+    def _check_profit_loss(self, symbol: str, profit: float, loss: float) -> tuple[bool, str]:
+        """Check profit and loss targets, return boolean flag if they are met."""
+        self._value_positions(symbol, verbose=False)
+        return self._profit_loss_met(profit, loss)
+
+
+def _balances_df(balances: list[dict]) -> pd.DataFrame:
+    """DataFrame of the non zero balances of an account information response."""
+    acc_df = pd.DataFrame(balances)
+    acc_df[['free', 'locked']] = acc_df[['free', 'locked']].astype(float)
+    acc_df.columns = ['Asset', 'Free', 'Locked']
+    acc_df = acc_df.loc[(acc_df['Free'] != 0.0) | (acc_df['Locked'] != 0.0)].reset_index()
+    return acc_df[['Asset', 'Free', 'Locked']]
+
+
+def _free_balances(balances: list[dict], coins: tuple[str, ...]) -> dict[str, float]:
+    """Free balance of coins in an account information response."""
+    free = {item['asset']: float(item['free']) for item in balances}
+    return {coin: free.get(coin, 0.0) for coin in coins}
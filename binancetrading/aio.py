@@ -0,0 +1,230 @@
+"""Asyncio Exchange and Account Classes"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+from urllib.parse import urlencode
+
+import aiohttp
+import pandas as pd
+from binance.error import ClientError, ServerError
+
+from binancetrading.account import BaseAccount, _balances_df, _free_balances, log_msg
+from binancetrading.candles import Kline, KlineDecoder
+from binancetrading.exchange import _candle_data_to_df, _candle_data_to_list, _check_paper_order
+from binancetrading.fills import FillModel
+from binancetrading.orders import MarketOrder, PaperOrder
+from binancetrading.scheduler import DEFAULT_SCHEDULER, RequestScheduler
+
+
+class AsyncClient:
+    """Binance REST client on a single pooled keep-alive aiohttp session.
+    Requests wait for request weight in the scheduler, shared with the synchronous clients by default."""
+
+    def __init__(self, key: str = '', secret: str = '', base_url: str = 'https://api.binance.com', pool_size: int = 100,
+                 scheduler: Optional[RequestScheduler] = None) -> None:
+        self.key = key
+        self.secret = secret
+        self.base_url = base_url
+        self.pool_size = pool_size
+        self.scheduler = scheduler or DEFAULT_SCHEDULER
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Shared HTTP session, created on first use so it binds to the running event loop."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60)
+            headers = {'Content-Type': 'application/json;charset=utf-8', 'X-MBX-APIKEY': self.key}
+            self._session = aiohttp.ClientSession(connector=connector, headers=headers)
+        return self._session
+
+    async def close(self) -> None:
+        """Close HTTP session."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def request(self, name: str, method: str, path: str, params: Optional[dict] = None, signed: bool = False):
+        """Send request through the scheduler, name is the client method name its weight and priority are looked up by."""
+        return await self.scheduler.acall(name, self._request, method, path, params, signed)
+
+    async def _request(self, method: str, path: str, params: Optional[dict] = None, signed: bool = False):
+        """Send request and return decoded response, raise ClientError or ServerError like the binance connector."""
+        params = {key: value for key, value in (params or {}).items() if value is not None}
+        if signed:  # Signed after waiting for weight, so the timestamp is fresh
+            params['timestamp'] = int(time.time() * 1000)
+            query = urlencode(params)
+            params['signature'] = hmac.new(self.secret.encode('utf-8'), query.encode('utf-8'), hashlib.sha256).hexdigest()
+        async with self.session.request(method, self.base_url + path, params=params) as response:
+            text = await response.text()
+            if 400 <= response.status < 500:
+                try:
+                    error = json.loads(text)
+                except ValueError:
+                    raise ClientError(response.status, None, text, response.headers) from None
+                raise ClientError(response.status, error['code'], error['msg'], response.headers)
+            if response.status >= 500:
+                raise ServerError(response.status, text)
+            return json.loads(text)
+
+    async def klines(self, symbol: str, interval: str, **kwargs) -> list[list]:
+        """Kline/candlestick data."""
+        return await self.request('klines', 'GET', '/api/v3/klines', {'symbol': symbol, 'interval': interval, **kwargs})
+
+    async def ticker_price(self, symbol: str) -> dict:
+        """Latest price of a symbol."""
+        return await self.request('ticker_price', 'GET', '/api/v3/ticker/price', {'symbol': symbol})
+
+    async def account(self, **kwargs) -> dict:
+        """Account information."""
+        return await self.request('account', 'GET', '/api/v3/account', kwargs, signed=True)
+
+    async def trade_fee(self, **kwargs) -> list[dict]:
+        """Trade fees."""
+        return await self.request('trade_fee', 'GET', '/sapi/v1/asset/tradeFee', kwargs, signed=True)
+
+    async def new_order(self, **kwargs) -> dict:
+        """Place new order."""
+        return await self.request('new_order', 'POST', '/api/v3/order', kwargs, signed=True)
+
+
+@dataclass
+class AsyncAccount(BaseAccount):
+    """Account class with asyncio methods, REST calls share one pooled HTTP session.
+    Use it with AsyncExchange, Exchange and TradingBot take the synchronous Account."""
+
+    def __post_init__(self) -> None:
+        super().__post_init__()
+        self.client = AsyncClient(key=self.api, secret=self.secret, base_url=self.apiurl, scheduler=self.scheduler)
+
+    async def account_balances(self) -> pd.DataFrame:
+        """Get current account balances from binance."""
+        return _balances_df((await self.client.account())['balances'])
+
+    async def get_coin_balances(self, *coins: str) -> dict[str, float]:
+        """Get free balance of several coins with a single request."""
+        return _free_balances((await self.client.account())['balances'], coins)
+
+    async def get_coin_balance(self, coin: str) -> float:
+        """Get balance of specific coin."""
+        return (await self.get_coin_balances(coin))[coin]
+
+    async def _set_positions(self, coin: str, position: float, cash_position: float) -> None:
+        """Initialize local portfolio to track orders and current positions."""
+        if self.paper_trade and not self.use_real_balance_as_paper:
+            self.position = position
+            self.cash_position = cash_position
+        else:
+            balances = await self.get_coin_balances(coin, 'USDT')
+            self.position = balances[coin]
+            self.cash_position = balances['USDT']
+
+    async def _value_positions(self, symbol: str, init: bool = False, verbose: bool = True) -> None:
+        """Value current positions."""
+        price = float((await self.client.ticker_price(symbol))['price'])
+        self._set_wealth(symbol, price, init, verbose)
+
+    async def _check_profit_loss(self, symbol: str, profit: float, loss: float) -> tuple[bool, str]:
+        """Check profit and loss targets, return boolean flag if they are met."""
+        await self._value_positions(symbol, verbose=False)
+        return self._profit_loss_met(profit, loss)
+
+    async def close(self) -> None:
+        """Close HTTP session."""
+        await self.client.close()
+
+
+class AsyncExchange:
+    """Exchange class with asyncio methods, requests for many symbols are sent concurrently on one pooled HTTP session."""
+
+    def __init__(self, wsurl: str = 'wss://stream.binance.com:9443/ws', apiurl: str = 'https://api.binance.com', fill_model: Optional[FillModel] = None,
+                 scheduler: Optional[RequestScheduler] = None) -> None:
+        self.wsurl = wsurl
+        self.client = AsyncClient(base_url=apiurl, scheduler=scheduler)
+        self.fill_model = fill_model
+
+    async def close(self) -> None:
+        """Close HTTP session."""
+        await self.client.close()
+
+    async def kline_df(self, coin: str, interval: str, lookback: int) -> pd.DataFrame:
+        """Return DataFrame with historic candlestick data."""
+        symbol = coin + 'USDT'
+        kline_data = await self.client.klines(symbol, interval, limit=lookback, endTime=int(time.time() * 1000 - 60000))
+        return _candle_data_to_df(kline_data, symbol, interval)
+
+    async def kline_dfs(self, coins: list[str], interval: str, lookback: int) -> dict[str, pd.DataFrame]:
+        """Return DataFrames with historic candlestick data of several coins, fetched concurrently."""
+        data = await asyncio.gather(*(self.kline_df(coin, interval, lookback) for coin in coins))
+        return dict(zip(coins, data))
+
+    async def ticker_prices(self, symbols: list[str]) -> dict[str, float]:
+        """Latest price of several symbols, fetched concurrently."""
+        tickers = await asyncio.gather(*(self.client.ticker_price(symbol) for symbol in symbols))
+        return {symbol: float(ticker['price']) for symbol, ticker in zip(symbols, tickers)}
+
+    async def kline_stream(self, symbol: str, interval: str) -> AsyncIterator[dict]:
+        """Yield kline messages of a symbol from a WebSocket on the shared HTTP session."""
+        async with self.client.session.ws_connect(f'{self.wsurl}/{symbol.lower()}@kline_{interval}', heartbeat=60) as websocket:
+            async for msg in websocket:
+                if msg.type == aiohttp.WSMsgType.TEXT:
+                    yield json.loads(msg.data)
+                elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                    break
+
+    async def closed_klines(self, symbol: str, interval: str) -> AsyncIterator[Kline]:
+        """Yield closed candlesticks of a symbol, decoded from the raw WebSocket messages without intermediate dictionaries."""
+        decoder = KlineDecoder()
+        async with self.client.session.ws_connect(f'{self.wsurl}/{symbol.lower()}@kline_{interval}', heartbeat=60) as websocket:
+            async for msg in websocket:
+                if msg.type == aiohttp.WSMsgType.TEXT:
+                    kline = decoder.decode(msg.data)
+                    if kline is not None:
+                        yield kline
+                elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                    break
+
+    async def execute_order(self, account: AsyncAccount, symbol: str, side: str, ammount: float, commission: float, paper_trade: bool,
+                            price: Optional[float] = None, data: Optional[pd.DataFrame] = None) -> None:
+        """Send market execution order to Binance or execute paper trade.
+        Paper trades are filled at price if given, else at the ticker price adjusted by the fill model."""
+        params = {"symbol": symbol, "side": side, "type": "MARKET", "quantity": str(ammount)}
+        try:
+            if not paper_trade:
+                confirmation = await account.client.new_order(**params)
+                order = MarketOrder(confirmation, commission)
+            else:
+                order = PaperOrder(params, commission)
+                if price is None:
+                    price = float((await account.client.ticker_price(symbol))['price'])
+                    if self.fill_model is not None:
+                        price = self.fill_model.fill_price(side, ammount, price, data)
+                order.set_price(price)
+                _check_paper_order(account, order.side, order.price, order.qty)
+            account.trades.append(order.order_dict)
+            account._refresh_positions(order.side, order.price, order.qty, order.commission)
+            log_msg(str(order), verb=True)
+        except ClientError as error:
+            log_msg(f'{side} order could not be executed. {error.error_message} {error.status_code} {error.error_code}', verb=True)
+
+    async def _init_candles(self, symbol: str, interval: str, lookback: int) -> list[dict]:
+        """Get historic data for strategies that need to look back to function."""
+        kline_data = await self.client.klines(symbol, interval, limit=lookback, endTime=int(time.time() * 1000 - 60000))
+        return _candle_data_to_list(kline_data, symbol, interval)
+
+    async def _get_commission(self, account: AsyncAccount, symbol: str) -> float:
+        """Get commission for a coin."""
+        try: # Try except needed because testnet has no commission atribute
+            commission_list = await account.client.trade_fee(symbol=symbol)
+        except ClientError:
+            return 0.0
+        for item in commission_list:
+            if item['symbol'] == symbol:
+                return float(item['takerCommission'])
+        return 0.0
+
@@ -3,25 +3,37 @@
 
 import sys
 import time
+from typing import Optional
 
-import matplotlib
-import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 
 from binancetrading.account import log_msg
-from binancetrading.exchange import _candle_list_to_df
+from binancetrading.cache import BacktestCache, BacktestResult, _cacheable, _fill_model_config
+from binancetrading.checkpoint import ACCOUNT_FIELDS
+from binancetrading.exchange import _candle_data_to_df, _candle_list_to_df
+from binancetrading.fills import FixedBpsFill
+from binancetrading.matching import MatchingEngine
 from binancetrading.trading_bot import TradingBot
 
 
 class Backtest:
     """Backtest class."""
 
-    def __init__(self, tradingbot: TradingBot, periods: int) -> None:
+    def __init__(self, tradingbot: TradingBot, periods: int, window: Optional[int] = None) -> None:
         self.tradingbot = tradingbot
         self.backtest_periods = periods
+        self.window = window  # Candlesticks passed to the strategy at each step, all of them if None
         self.init_wealth: float = 0.0
         self.final_wealth: float = 0.0
         self.backtest_df: pd.DataFrame = pd.DataFrame()
+        self.equity_times: list[int] = []  # Close times (ms) of the candlesticks evaluated
+        self.equity: list[float] = []  # Portfolio value at those close times
+        self.record_equity = True  # Chunked backtests keep only the running peak and max drawdown
+        self._peak = -np.inf
+        self._max_drawdown = 0.0
+        self.metrics: dict[str, float] = {}
+        self.commission: Optional[float] = None  # Trading fee, fetched once on the first run
 
         self.tradingbot.account._set_positions(self.tradingbot.coin, self.tradingbot.account.paper_position, self.tradingbot.account.paper_cash_position)
         self.tradingbot.account._value_positions(self.tradingbot.symbol, init=True)
@@ -39,33 +51,179 @@ class Backtest:
         data_list = self.tradingbot.exchange._init_candles(symbol, interval, backtest_periods)
         return _candle_list_to_df(data_list)
 
-    def run_backtest(self, log_candles: bool = False, plot: bool = False) -> float:
-        """Execute backtest on strategy."""
+    def download_hist_data(self, path: str, start_time: int, end_time: int) -> None:
+        """Write candlesticks opened between start and end time (ms) to a CSV file page by page, for chunked backtests."""
+        exchange, symbol, interval = self.tradingbot.exchange, self.tradingbot.symbol, self.tradingbot.interval
+        header = True
+        while start_time <= end_time:
+            kline_data = exchange.scheduler.call(exchange.client.klines, symbol, interval, startTime=start_time, endTime=end_time, limit=1000)
+            if not kline_data:
+                break
+            _candle_data_to_df(kline_data, symbol, interval).to_csv(path, mode='w' if header else 'a', header=header, index=False)
+            header = False
+            start_time = kline_data[-1][0] + 1
+
+    def run_backtest(self, log_candles: bool = False, plot: bool = False, data: Optional[pd.DataFrame] = None,
+                     cache: Optional[BacktestCache] = None) -> float:
+        """Execute backtest on strategy, on data if given else on the last backtest periods candlesticks.
+        With a cache, results of a previous run on the same data and configuration are loaded instead."""
         log_msg(f'############\n# BACKTEST #\n############\n\nRunning Backest on {str(self.tradingbot.strategy)}, {self.backtest_periods} Data Points')
         log_msg(f'Started at: {time.strftime("%Y-%m-%d %H:%M", time.localtime())}')
         log_msg(f'Symbol: {self.tradingbot.symbol}\nInterval: {self.tradingbot.interval}\nOrdersize: {self.tradingbot.order_size}')
         log_msg(f'Take profit: {self.tradingbot.profit}%\nStop Loss: {self.tradingbot.profit}%')
-        data = self.get_hist_data(self.tradingbot.symbol, self.tradingbot.interval, self.backtest_periods)
-        self.init_wealth = self._value_portfolio(data.iloc[0]['Open price'])
-
-        for i in range(self.tradingbot.strategy.get_lookback() + 1, data.shape[0]):
-            live_data = data.iloc[:i]
-            if log_candles:
-                log_msg(live_data.to_string(index=False))
-            signal = self.tradingbot.execute_strategy(live_data)
-            if signal:
-                self.tradingbot.account.trades[-1]['Time'] = live_data.iloc[-1]['Close time']
+        if data is None:
+            data = self.get_hist_data(self.tradingbot.symbol, self.tradingbot.interval, self.backtest_periods)
+        if cache is not None and not _cacheable(self.tradingbot.strategy):
+            log_msg('Strategy has no seed, backtest results are not cached.', verb=True)
+            cache = None
+        key = cache.key(data, self._config(), self.tradingbot.strategy) if cache is not None else None
+        result = cache.get(key) if cache is not None else None
+        if result is not None:
+            log_msg('Loaded backtest results from cache.', verb=True)
+            self._load_result(result)
+        else:
+            self._simulate(data, log_candles)
+            if cache is not None:
+                cache.put(key, self.result())
 
         log_msg(f'Number of trades: {len(self.tradingbot.account.trades)}', verb=True)
         log_msg(f'{pd.DataFrame(self.tradingbot.account.trades).to_string(index=False)}', verb=True)
-        self.final_wealth = self._value_portfolio(data.iloc[-1]['Close price'])
-        self.backtest_df = self._backtest_results_dataframe(live_data)
+        self.backtest_df = self._backtest_results_dataframe(data.iloc[:-1])
         self.tradingbot.account._value_positions(self.tradingbot.symbol)
         log_msg(f'Return of {str(self.tradingbot.strategy)}: {self.final_wealth - self.init_wealth:.2f} ({(self.final_wealth / self.init_wealth - 1) * 100:.2f}%)', verb=True)
         if plot:
             self._plot_backtest_results()
         return self.final_wealth - self.init_wealth
 
+    def run_chunked_backtest(self, path: str, chunk_size: int = 100_000, log_candles: bool = False) -> float:
+        """Execute backtest on a CSV file of candlesticks (see download_hist_data) read in blocks of chunk_size rows.
+        The last window candlesticks and the account carry over between blocks, so peak memory depends on chunk_size and window,
+        not on history length, and results match run_backtest on the same data with the same window."""
+        if self.window is None:
+            log_msg('Chunked backtest needs a window of candlesticks to carry between chunks.', verb=True)
+            sys.exit(1)
+        log_msg(f'############\n# BACKTEST #\n############\n\nRunning chunked Backest on {str(self.tradingbot.strategy)}, {path}')
+        lookback = self.tradingbot.strategy.get_lookback()
+        self._reset_equity()
+        record_equity, self.record_equity = self.record_equity, False  # An equity curve would grow with the history
+        carry = pd.DataFrame()
+        try:
+            for chunk in pd.read_csv(path, chunksize=chunk_size, parse_dates=['Open time', 'Close time']):
+                if carry.empty:
+                    self.init_wealth = self._value_portfolio(chunk.iloc[0]['Open price'])
+                    start = 0
+                else:
+                    start = len(carry) - 1  # Last candlestick of the previous chunk is evaluated once its successor is read
+                data = pd.concat([carry, chunk])  # Chunks keep a running index, as if data were one DataFrame
+                fill_prices = self._fill_prices(data)
+                for j in range(start, len(data) - 1):
+                    if data.index[j] < lookback:
+                        continue
+                    live_data = data.iloc[max(0, j + 1 - self.window):j + 1]
+                    self._step(live_data, {side: prices[j] for side, prices in fill_prices.items()}, log_candles)
+                carry = data.iloc[-self.window:]
+        finally:
+            self.record_equity = record_equity
+
+        log_msg(f'Number of trades: {len(self.tradingbot.account.trades)}', verb=True)
+        log_msg(f'{pd.DataFrame(self.tradingbot.account.trades).to_string(index=False)}', verb=True)
+        self.final_wealth = self._value_portfolio(carry.iloc[-1]['Close price'])
+        self._set_metrics()
+        log_msg(f'Return of {str(self.tradingbot.strategy)}: {self.final_wealth - self.init_wealth:.2f} ({(self.final_wealth / self.init_wealth - 1) * 100:.2f}%)', verb=True)
+        return self.final_wealth - self.init_wealth
+
+    def reset(self) -> None:
+        """Reset positions, resting orders and results to their initial state, so the backtest can run again."""
+        account = self.tradingbot.account
+        account._set_positions(self.tradingbot.coin, account.paper_position, account.paper_cash_position)
+        account.commissions = 0.0
+        account.trades[:] = []
+        self.tradingbot.exchange.matching_engine = MatchingEngine()
+        self.init_wealth = self.final_wealth = 0.0
+        self.backtest_df = pd.DataFrame()
+        self.metrics = {}
+        self._reset_equity()
+
+    def _reset_equity(self) -> None:
+        """Clear the equity curve, running peak and max drawdown before a run."""
+        self.equity_times, self.equity = [], []
+        self._peak, self._max_drawdown = -np.inf, 0.0
+
+    def _simulate(self, data: pd.DataFrame, log_candles: bool = False) -> None:
+        """Run strategy over every candlestick of data, without logging results or querying Binance for prices."""
+        self._reset_equity()
+        self.init_wealth = self._value_portfolio(data.iloc[0]['Open price'])
+        fill_prices = self._fill_prices(data)
+        for i in range(self.tradingbot.strategy.get_lookback() + 1, data.shape[0]):
+            live_data = data.iloc[:i] if self.window is None else data.iloc[max(0, i - self.window):i]
+            self._step(live_data, {side: prices[i - 1] for side, prices in fill_prices.items()}, log_candles)
+        self.final_wealth = self._value_portfolio(data.iloc[-1]['Close price'])
+        self._set_metrics()
+
+    def _step(self, live_data: pd.DataFrame, fill_prices: dict[str, float], log_candles: bool) -> None:
+        """Match resting orders against the last candlestick and run the strategy on live data."""
+        if log_candles:
+            log_msg(live_data.to_string(index=False))
+        self._match_orders(live_data.iloc[-1])
+        n_trades = len(self.tradingbot.account.trades)
+        self.tradingbot.execute_strategy(live_data, fill_prices, self._get_commission())
+        for trade in self.tradingbot.account.trades[n_trades:]:  # Rejected orders add no trade
+            trade['Time'] = live_data.iloc[-1]['Close time']
+        value = self._value_portfolio(live_data.iloc[-1]['Close price'])
+        self._peak = max(self._peak, value)
+        self._max_drawdown = max(self._max_drawdown, 1 - value / self._peak)
+        if self.record_equity:
+            self.equity_times.append(live_data.iloc[-1]['Close time'].value // 10**6)
+            self.equity.append(value)
+
+    def result(self) -> BacktestResult:
+        """Trades, equity curve, metrics and final account positions of the last run."""
+        account = {name: getattr(self.tradingbot.account, name) for name in ACCOUNT_FIELDS}
+        return BacktestResult(self.tradingbot.account.trades, np.array(self.equity_times, dtype=np.int64), np.array(self.equity, dtype=np.float64),
+                              self.metrics, account)
+
+    def _load_result(self, result: BacktestResult) -> None:
+        """Set trades, equity curve, metrics and account positions from a cached run."""
+        self.tradingbot.account.trades[:] = [{**trade, 'Time': pd.Timestamp(trade['Time'])} for trade in result.trades]
+        for name, value in result.account.items():
+            setattr(self.tradingbot.account, name, value)
+        self.equity_times, self.equity = result.equity_times.tolist(), result.equity.tolist()
+        self.metrics = result.metrics
+        self.init_wealth, self.final_wealth = self.metrics['init_wealth'], self.metrics['final_wealth']
+
+    def _set_metrics(self) -> None:
+        """Summary metrics of the run."""
+        self.metrics = {'init_wealth': float(self.init_wealth), 'final_wealth': float(self.final_wealth),
+                        'return': float(self.final_wealth - self.init_wealth), 'return_pct': float((self.final_wealth / self.init_wealth - 1) * 100),
+                        'max_drawdown': float(self._max_drawdown), 'trades': len(self.tradingbot.account.trades)}
+
+    def _get_commission(self) -> float:
+        """Trading fee of the symbol, fetched from Binance once."""
+        if self.commission is None:
+            self.commission = self.tradingbot.exchange._get_commission(self.tradingbot.account, self.tradingbot.symbol)
+        return self.commission
+
+    def _config(self) -> dict:
+        """Bot, account and exchange settings that change backtest results, for the cache key."""
+        bot, account = self.tradingbot, self.tradingbot.account
+        return {'symbol': bot.symbol, 'interval': bot.interval, 'order_size': bot.order_size, 'profit': bot.profit, 'loss': bot.loss,
+                'window': self.window, 'paper_position': account.paper_position, 'paper_cash_position': account.paper_cash_position,
+                'commission': self._get_commission(), 'fill_model': _fill_model_config(bot.exchange.fill_model)}
+
+    def _match_orders(self, candle: pd.Series) -> None:
+        """Match resting paper orders against a candlestick, fills are timed at its close."""
+        trades = self.tradingbot.account.trades
+        n_trades = len(trades)
+        self.tradingbot.exchange._match_paper_orders(self.tradingbot.account, self.tradingbot.symbol, candle['Open price'], candle['High price'], candle['Low price'])
+        for trade in trades[n_trades:]:
+            trade['Time'] = candle['Close time']
+
+    def _fill_prices(self, data: pd.DataFrame) -> dict:
+        """Fill prices of a buy and a sell order at the close of every candlestick, computed at once with the exchange fill model."""
+        fill_model = self.tradingbot.exchange.fill_model or FixedBpsFill(bps=0.0)
+        prices = data['Close price'].to_numpy(dtype=float)
+        return {side: fill_model.fill_prices(side, self.tradingbot.order_size, prices, data) for side in ('BUY', 'SELL')}
+
     def _value_portfolio(self, price: float) -> float:
         """Value current portfolio."""
         cash_position = self.tradingbot.account.cash_position
@@ -84,6 +242,8 @@ class Backtest:
 
     def _plot_backtest_results(self, save: bool = False) -> None:
         """Plot price chart, entry and exit signals."""
+        import matplotlib
+        import matplotlib.pyplot as plt
         _, axis = plt.subplots(1, 1, figsize=(10, 8))
         axis.plot(self.backtest_df['Close time'], self.backtest_df['Close price'], zorder=1)
         axis.scatter(self.backtest_df['Close time'], self.backtest_df['BUY'], color='green', label='Buy', marker='^', s=75, zorder=2)
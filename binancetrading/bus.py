@@ -0,0 +1,218 @@
+"""Shared Memory Market Data Bus"""
+
+import os
+import sys
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Optional
+
+import numpy as np
+
+from binancetrading.account import log_msg
+from binancetrading.candles import Kline, _kline_from_dict
+from binancetrading.exchange import Exchange, _interval_ms, _KlineStream
+
+HEADER = 4  # Sequence number, number of candlesticks written, publisher process id and heartbeat
+INT_FIELDS = 3  # open_time, close_time, trades
+FLOAT_FIELDS = 5  # open, close, high, low, volume
+
+
+def bus_name(symbol: str, interval: str) -> str:
+    """Name of the shared memory segment of a symbol and interval."""
+    return f'bt_{symbol}_{interval}'.lower()
+
+
+class _Ring:
+    """Ring buffer of candlesticks in a shared memory segment.
+    The header holds a sequence number, odd while the writer is changing the ring, the number of candlesticks written,
+    the process id of the writer and its heartbeat, the time (ms) of the last message of the symbol stream."""
+
+    def __init__(self, memory: shared_memory.SharedMemory, capacity: int) -> None:
+        self.memory = memory
+        self.capacity = capacity
+        self.header = np.ndarray((HEADER,), dtype=np.int64, buffer=memory.buf)
+        self.ints = np.ndarray((capacity, INT_FIELDS), dtype=np.int64, buffer=memory.buf, offset=HEADER * 8)
+        self.floats = np.ndarray((capacity, FLOAT_FIELDS), dtype=np.float64, buffer=memory.buf, offset=(HEADER + capacity * INT_FIELDS) * 8)
+
+    @staticmethod
+    def size(capacity: int) -> int:
+        """Bytes needed for a ring of capacity candlesticks."""
+        return (HEADER + capacity * (INT_FIELDS + FLOAT_FIELDS)) * 8
+
+
+class CandleBusWriter:
+    """Single writer of the candlesticks of one symbol to a shared memory ring buffer."""
+
+    def __init__(self, symbol: str, interval: str, capacity: int = 10000) -> None:
+        self.symbol = symbol
+        self.interval = interval
+        try:
+            memory = shared_memory.SharedMemory(bus_name(symbol, interval), create=True, size=_Ring.size(capacity))
+        except FileExistsError:
+            _remove_stale(bus_name(symbol, interval))
+            memory = shared_memory.SharedMemory(bus_name(symbol, interval), create=True, size=_Ring.size(capacity))
+        self.ring = _Ring(memory, capacity)
+        self.ring.header[:] = 0
+        self.ring.header[2] = os.getpid()
+        self.beat(time.time())  # Give the stream time to connect before readers take the publisher as stale
+
+    @property
+    def last_open_time(self) -> int:
+        """Open time (ms) of the last candlestick written, 0 if empty."""
+        count = int(self.ring.header[1])
+        return int(self.ring.ints[(count - 1) % self.ring.capacity, 0]) if count else 0
+
+    def beat(self, timestamp: float) -> None:
+        """Publish the time the symbol stream was last heard from."""
+        self.ring.header[3] = int(timestamp * 1000)
+
+    def append(self, kline: Kline) -> bool:
+        """Publish closed candlestick if it is new, return True if it was written."""
+        if self.ring.header[1] and kline.open_time <= self.last_open_time:
+            return False
+        header = self.ring.header
+        slot = int(header[1]) % self.ring.capacity
+        header[0] += 1  # Odd, readers retry
+        self.ring.ints[slot] = (kline.open_time, kline.close_time, kline.trades)
+        self.ring.floats[slot] = (kline.open, kline.close, kline.high, kline.low, kline.volume)
+        header[1] += 1
+        header[0] += 1  # Even, ring is consistent again
+        return True
+
+    def close(self) -> None:
+        """Close and remove the shared memory segment."""
+        self.ring.memory.close()
+        self.ring.memory.unlink()
+
+
+class CandleBusReader:
+    """Lock free reader of a shared memory candlestick ring buffer written by a CandleBusPublisher."""
+
+    def __init__(self, symbol: str, interval: str, timeout: float = 30.0) -> None:
+        self.symbol = symbol
+        self.interval = interval
+        deadline = time.time() + timeout
+        while True:
+            try:
+                memory = _attach(bus_name(symbol, interval))
+                break
+            except FileNotFoundError:
+                if time.time() > deadline:
+                    raise
+                time.sleep(0.1)
+        capacity = (memory.size // 8 - HEADER) // (INT_FIELDS + FLOAT_FIELDS)
+        self.ring = _Ring(memory, capacity)
+        self.count = 0
+
+    def poll(self, max_len: Optional[int] = None) -> list[Kline]:
+        """Candlesticks written since the last poll, at most the last max_len (default: ring capacity) of them."""
+        header = self.ring.header
+        while True:
+            seq = int(header[0])
+            if seq % 2:
+                continue
+            count = int(header[1])
+            first = max(self.count, count - min(max_len or self.ring.capacity, self.ring.capacity))
+            slots = np.arange(first, count) % self.ring.capacity
+            ints, floats = self.ring.ints[slots], self.ring.floats[slots]  # Fancy indexing copies
+            if int(header[0]) == seq:
+                break
+        self.count = count
+        return [Kline(i[0], i[1], *f, i[2]) for i, f in zip(ints.tolist(), floats.tolist())]
+
+    def is_live(self, stale_after: float = 120.0) -> bool:
+        """Check that the publisher process is running and heard from the symbol stream in the last stale_after seconds."""
+        if not _process_alive(int(self.ring.header[2])):
+            return False
+        return time.time() * 1000 - int(self.ring.header[3]) <= stale_after * 1000
+
+    def close(self) -> None:
+        """Detach from the shared memory segment."""
+        self.ring.memory.close()
+
+
+class CandleBusPublisher:
+    """Ingest process: one WebSocket connection per symbol publishing closed candlesticks to shared memory for all bots on the host.
+    Each stream is supervised like a bot stream and reopened with backoff if it drops or goes quiet."""
+
+    def __init__(self, exchange: Exchange, coins: list[str], interval: str, capacity: int = 10000) -> None:
+        self.exchange = exchange
+        self.interval = interval
+        self.writers = {coin + 'USDT': CandleBusWriter(coin + 'USDT', interval, capacity) for coin in coins}
+        self.lock = threading.Lock()
+        for symbol, writer in self.writers.items():
+            for kline in self.exchange._init_candles(symbol, interval, min(capacity, 1000)):
+                writer.append(_kline_from_dict(kline))
+
+    def run(self, stale_after: float = 60.0) -> None:
+        """Publish candlesticks until interrupted, reopening streams quiet for stale_after seconds."""
+        self.exchange.websocketclient.start()
+        streams = {symbol: _KlineStream(self.exchange, self._ws_handler, symbol, self.interval, stream_id, stale_after)
+                   for stream_id, symbol in enumerate(self.writers, 1)}
+        for stream in streams.values():
+            stream.subscribe()
+        log_msg(f'Publishing {", ".join(self.writers)} {self.interval} candlesticks.', verb=True)
+        try:
+            while not self.exchange.event.is_set():
+                for symbol, stream in streams.items():
+                    stream.supervise()
+                    if stream.last_message:
+                        self.writers[symbol].beat(stream.last_message)
+                self.exchange.event.wait(1)
+        except KeyboardInterrupt:
+            log_msg('KeyboardInterrupt', verb=True)
+        finally:
+            self.exchange.websocketclient.stop()
+            for writer in self.writers.values():
+                writer.close()
+
+    def _ws_handler(self, msg: dict) -> None:
+        """Publish closed candlesticks, backfilling gaps over REST first."""
+        if 'k' not in msg or not msg['k']['x'] or msg['s'] not in self.writers:
+            return
+        writer = self.writers[msg['s']]
+        with self.lock:
+            step = _interval_ms(self.interval)
+            if step and writer.last_open_time and msg['k']['t'] > writer.last_open_time + step:
+                for kline in self.exchange._backfill_candles(msg['s'], self.interval, writer.last_open_time + step, msg['k']['t'] - 1):
+                    writer.append(_kline_from_dict(kline))
+            writer.append(_kline_from_dict(msg['k']))
+
+
+def _remove_stale(name: str) -> None:
+    """Remove shared memory segment left over by a crashed publisher, raise FileExistsError if its publisher is still running."""
+    stale = _attach(name)
+    pid = int(np.ndarray((1,), dtype=np.int64, buffer=stale.buf, offset=16)[0]) if stale.size >= HEADER * 8 else 0
+    if _process_alive(pid):
+        stale.close()
+        raise FileExistsError(f'{name} is published by running process {pid}.')
+    stale.close()
+    if sys.version_info < (3, 13):  # unlink unregisters the segment, which _attach left untracked
+        resource_tracker.register(stale._name, 'shared_memory')
+    stale.unlink()
+
+
+def _process_alive(pid: int) -> bool:
+    """Check if a process is running. On Windows a segment only exists while a process has it open, so its owner is taken as alive."""
+    if os.name == 'nt':
+        return True
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:  # Running under another user
+        return True
+    return True
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Attach to existing shared memory without letting this process' resource tracker remove it on exit.
+    Readers started as child processes of the publisher share its tracker, which then warns once when the publisher unlinks the segment."""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name, track=False)
+    memory = shared_memory.SharedMemory(name)
+    resource_tracker.unregister(memory._name, 'shared_memory')
+    return memory
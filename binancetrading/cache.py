@@ -0,0 +1,143 @@
+"""Backtest Result Cache"""
+
+import dataclasses
+import hashlib
+import inspect
+import json
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from binancetrading.checkpoint import _json_bytes, _savez_atomic
+
+CACHE_VERSION = 1  # Bump when backtest results change for the same inputs
+
+
+@dataclass
+class BacktestResult:
+    """Trades, equity curve and summary metrics of a backtest run."""
+
+    trades: list[dict]
+    equity_times: np.ndarray  # Candlestick close times (ms)
+    equity: np.ndarray  # Portfolio value at each close
+    metrics: dict[str, float]
+    account: dict[str, float]
+
+    def equity_curve(self) -> pd.Series:
+        """Equity curve indexed by close time."""
+        return pd.Series(self.equity, index=pd.to_datetime(self.equity_times, unit='ms'), name='Equity')
+
+
+@dataclass
+class BacktestCache:
+    """On disk cache of backtest results, keyed by a hash of the candlestick data and the full bot configuration.
+    Entries are npz files; the least recently used ones are removed once the cache exceeds max_bytes."""
+
+    path: str = '.backtest_cache'
+    max_bytes: int = 512 * 2**20
+
+    def __post_init__(self) -> None:
+        os.makedirs(self.path, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._entries())
+
+    def key(self, data: pd.DataFrame, config: dict, strategy) -> str:
+        """Hash of the candlesticks, the configuration and the strategy parameters and source code."""
+        digest = hashlib.sha256()
+        digest.update(str(CACHE_VERSION).encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+        digest.update(json.dumps(config, sort_keys=True, default=str).encode('utf-8'))
+        digest.update(json.dumps(_strategy_config(strategy), sort_keys=True, default=str).encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[BacktestResult]:
+        """Cached result for key, None on a miss."""
+        path = self._entry_path(key)
+        try:
+            with np.load(path, allow_pickle=False) as entry:
+                result = BacktestResult(json.loads(entry['trades'].tobytes()), entry['equity_times'], entry['equity'],
+                                        json.loads(entry['metrics'].tobytes()), json.loads(entry['account'].tobytes()))
+        except (FileNotFoundError, OSError, ValueError, KeyError):  # Missing, evicted meanwhile or unreadable
+            return None
+        os.utime(path)  # Mark as recently used
+        return result
+
+    def put(self, key: str, result: BacktestResult) -> None:
+        """Store result under key and evict old entries."""
+        arrays = {'trades': _json_bytes(result.trades), 'equity_times': np.asarray(result.equity_times, dtype=np.int64),
+                  'equity': np.asarray(result.equity, dtype=np.float64), 'metrics': _json_bytes(result.metrics),
+                  'account': _json_bytes(result.account)}
+        _savez_atomic(self._entry_path(key), arrays)
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        entries = self._entries()
+        size = sum(stat.st_size for _, stat in entries)
+        for path, stat in sorted(entries, key=lambda entry: entry[1].st_mtime):
+            if size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size -= stat.st_size
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        for path, _ in self._entries():
+            os.remove(path)
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.path, f'{key}.npz')
+
+    def _entries(self) -> list[tuple[str, os.stat_result]]:
+        """Paths and stats of the cache entries."""
+        entries = []
+        with os.scandir(self.path) as scan:
+            for entry in scan:
+                if entry.name.endswith('.npz'):
+                    try:
+                        entries.append((entry.path, entry.stat()))
+                    except FileNotFoundError:
+                        pass
+        return entries
+
+
+def _fill_model_config(fill_model) -> dict:
+    """Class and full state of a fill model, arrays such as recorded order books are hashed."""
+    if fill_model is None:
+        return {}
+    if dataclasses.is_dataclass(fill_model):
+        state = {item.name: getattr(fill_model, item.name) for item in dataclasses.fields(fill_model) if item.init}
+    else:
+        state = vars(fill_model)
+    params = {}
+    for name, value in state.items():
+        if isinstance(value, np.ndarray):
+            value = {'shape': value.shape, 'dtype': str(value.dtype), 'sha256': hashlib.sha256(np.ascontiguousarray(value).tobytes()).hexdigest()}
+        params[name] = value
+    return {'class': f'{type(fill_model).__module__}.{type(fill_model).__qualname__}', 'params': params}
+
+
+def _cacheable(strategy) -> bool:
+    """Strategies drawing random numbers are only cached with a seed, unseeded runs differ every time."""
+    return getattr(strategy, 'seed', 0) is not None
+
+
+def _strategy_config(strategy) -> dict:
+    """Class, parameters and source code of a strategy, so edited strategies miss the cache.
+    The source of the whole module is used, which covers helper functions defined next to the strategy."""
+    params = dataclasses.asdict(strategy) if dataclasses.is_dataclass(strategy) else vars(strategy)
+    try:
+        source = inspect.getsource(inspect.getmodule(type(strategy)))
+    except (OSError, TypeError):  # Defined interactively
+        try:
+            source = inspect.getsource(type(strategy))
+        except (OSError, TypeError):
+            source = ''
+    return {'class': f'{type(strategy).__module__}.{type(strategy).__qualname__}', 'params': params, 'source': source}
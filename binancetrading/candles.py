@@ -0,0 +1,161 @@
+"""Candlestick Buffer and Kline Decoder"""
+
+import json
+from typing import NamedTuple, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+try:
+    import msgspec
+except ImportError:  # Optional, decoding falls back to json
+    msgspec = None
+
+
+class Kline(NamedTuple):
+    """Closed candlestick with numeric fields."""
+
+    open_time: int
+    close_time: int
+    open: float
+    close: float
+    high: float
+    low: float
+    volume: float
+    trades: int
+
+
+def _kline_from_dict(kline: dict) -> Kline:
+    """Convert kline dictionary from the WebSocket or _candle_data_to_list to Kline."""
+    return Kline(int(kline['t']), int(kline['T']), float(kline['o']), float(kline['c']), float(kline['h']),
+                 float(kline['l']), float(kline['v']), int(kline['n']))
+
+
+if msgspec is not None:
+    class _KlineFields(msgspec.Struct):
+        """Typed schema of the kline fields used, other fields are skipped by the decoder."""
+        t: int
+        T: int
+        o: float
+        c: float
+        h: float
+        l: float
+        v: float
+        n: int
+        x: bool
+
+    class _KlineEvent(msgspec.Struct):
+        """Typed schema of a kline stream message."""
+        k: _KlineFields
+
+
+class KlineDecoder:
+    """Decode raw kline stream messages straight into Kline tuples, without building nested dictionaries.
+    Uses msgspec typed schemas when installed, else the json module."""
+
+    def __init__(self) -> None:
+        # strict=False lets msgspec parse the quoted decimals Binance sends as floats
+        self._decoder = msgspec.json.Decoder(_KlineEvent, strict=False) if msgspec is not None else None
+
+    def decode(self, raw: Union[bytes, str]) -> Optional[Kline]:
+        """Return closed candlestick of a kline message, None for updates of open candlesticks and other messages."""
+        if isinstance(raw, str):
+            raw = raw.encode('utf-8')
+        if b'"x":false' in raw:  # Skip open candlestick updates in Binance's compact JSON before parsing
+            return None
+        if self._decoder is None:
+            try:
+                kline = json.loads(raw)['k']
+                return _kline_from_dict(kline) if kline['x'] is True else None
+            except (KeyError, TypeError, ValueError):
+                return None
+        try:
+            kline = self._decoder.decode(raw).k
+        except msgspec.DecodeError:
+            return None
+        if not kline.x:
+            return None
+        return Kline(kline.t, kline.T, kline.o, kline.c, kline.h, kline.l, kline.v, kline.n)
+
+
+class CandleBuffer:
+    """Closed candlesticks of one symbol stored in numeric numpy columns, keeping at most max_len of them."""
+
+    FLOAT_FIELDS = ('open', 'close', 'high', 'low', 'volume')
+    INT_FIELDS = ('open_time', 'close_time', 'trades')
+
+    def __init__(self, symbol: str, interval: str, max_len: int = 10000) -> None:
+        self.symbol = symbol
+        self.interval = interval
+        self.max_len = max_len
+        self._start = 0
+        self._end = 0
+        capacity = 2 * max_len  # Extra room so old candlesticks are dropped in blocks
+        self._columns: dict[str, np.ndarray] = {name: np.zeros(capacity, dtype=np.int64) for name in self.INT_FIELDS}
+        self._columns.update({name: np.zeros(capacity, dtype=np.float64) for name in self.FLOAT_FIELDS})
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        """View of a column, oldest candlestick first."""
+        return self._columns[name][self._start:self._end]
+
+    @property
+    def last_open_time(self) -> int:
+        """Open time (ms) of the last candlestick, 0 if empty."""
+        return int(self._columns['open_time'][self._end - 1]) if len(self) else 0
+
+    def last(self) -> Kline:
+        """Last candlestick."""
+        i = self._end - 1
+        return Kline(*(self._columns[name][i].item() for name in Kline._fields))
+
+    def append(self, kline: Kline) -> bool:
+        """Append closed candlestick if it is newer than the last one, return True if it was added."""
+        if len(self) and kline.open_time <= self.last_open_time:
+            return False
+        if self._end == len(self._columns['open_time']):
+            self._compact()
+        for name, value in zip(Kline._fields, kline):
+            self._columns[name][self._end] = value
+        self._end += 1
+        if len(self) > self.max_len:
+            self._start += 1
+        return True
+
+    def append_kline(self, kline: dict) -> bool:
+        """Append closed candlestick given as a kline dictionary, return True if it was added."""
+        return self.append(_kline_from_dict(kline))
+
+    def columns(self) -> dict[str, np.ndarray]:
+        """Views of all columns, oldest candlestick first."""
+        return {name: self[name] for name in self._columns}
+
+    def load(self, columns: dict[str, np.ndarray]) -> None:
+        """Replace contents with the last max_len candlesticks of the given columns."""
+        size = min(len(columns['open_time']), self.max_len)
+        for name, column in self._columns.items():
+            column[:size] = columns[name][len(columns[name]) - size:]
+        self._start, self._end = 0, size
+
+    def to_df(self) -> pd.DataFrame:
+        """DataFrame with the same columns as _candle_list_to_df."""
+        return pd.DataFrame({
+            'Open time': pd.to_datetime(self['open_time'], unit='ms'),
+            'Close time': pd.to_datetime(self['close_time'], unit='ms'),
+            'Symbol': self.symbol,
+            'Interval': self.interval,
+            'Open price': self['open'],
+            'Close price': self['close'],
+            'High price': self['high'],
+            'Low price': self['low'],
+            'Base asset volume': self['volume'],
+            'Number of trades': self['trades']}, copy=True)
+
+    def _compact(self) -> None:
+        """Move kept candlesticks to the start of the columns."""
+        size = len(self)
+        for column in self._columns.values():
+            column[:size] = column[self._start:self._end]
+        self._start, self._end = 0, size
@@ -0,0 +1,114 @@
+"""Live Chart"""
+
+import time
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from binancetrading.candles import CandleBuffer
+
+MS_PER_DAY = 86_400_000
+
+
+class LiveChart:
+    """Live price chart of one or more symbols fed by candle buffers and kline stream messages.
+    Only the line and trade marker artists are redrawn with blitting, axes are redrawn when prices leave their limits."""
+
+    def __init__(self, symbols: list[str], interval: str, window: int = 120, candles: Optional[dict[str, CandleBuffer]] = None,
+                 trades: Optional[list[dict]] = None) -> None:
+        import matplotlib.pyplot as plt
+        self.symbols = symbols
+        self.window = window
+        self.candles = candles or {symbol: CandleBuffer(symbol, interval, max_len=window) for symbol in symbols}
+        self.trades = trades if trades is not None else []
+        self.live_price: dict[str, tuple[int, float]] = {}
+        self._n_trades = -1
+
+        self.figure, axes = plt.subplots(len(symbols), 1, figsize=(10, 4 * len(symbols)), squeeze=False)
+        self.axes = dict(zip(symbols, axes[:, 0]))
+        self.lines, self.buys, self.sells = {}, {}, {}
+        for symbol, axis in self.axes.items():
+            self.lines[symbol], = axis.plot([], [], zorder=1)
+            self.buys[symbol], = axis.plot([], [], '^', color='green', label='Buy', markersize=9, zorder=2)
+            self.sells[symbol], = axis.plot([], [], 'v', color='red', label='Sell', markersize=9, zorder=2)
+            axis.xaxis_date()
+            axis.tick_params(axis='x', labelrotation=30)
+            axis.yaxis.set_major_formatter('{x:,.2f}')
+            axis.set_ylabel('Price')
+            axis.set_title(symbol, fontsize=16)
+        self.figure.tight_layout()
+
+    def ws_handler(self, msg: dict) -> None:
+        """Handle kline stream message, closed candlesticks are stored and open ones move the live price."""
+        if 'k' not in msg or msg['s'] not in self.candles:
+            return
+        if msg['k']['x']:
+            self.candles[msg['s']].append_kline(msg['k'])
+        self.live_price[msg['s']] = (msg['E'], float(msg['k']['c']))
+
+    def show(self, refreshrate: int = 1000) -> None:
+        """Animate chart until its window is closed."""
+        import matplotlib.pyplot as plt
+        from matplotlib.animation import FuncAnimation
+        _ = FuncAnimation(self.figure, self._update, interval=refreshrate, blit=True, cache_frame_data=False)
+        plt.show()
+
+    def _update(self, _) -> list:
+        """Set data of changed artists, return every artist drawn with blitting."""
+        artists = []
+        rescale = False
+        for symbol in self.symbols:
+            times, prices = self._series(symbol)
+            if not len(times):
+                continue
+            self.lines[symbol].set_data(times, prices)
+            artists.append(self.lines[symbol])
+            rescale |= self._out_of_limits(self.axes[symbol], times, prices)
+        if len(self.trades) != self._n_trades:
+            self._n_trades = len(self.trades)
+            self._update_trades()
+        for symbol in self.symbols:  # Blitted artists are only drawn when returned, markers are returned on every frame
+            artists.extend((self.buys[symbol], self.sells[symbol]))
+        if rescale:
+            self.figure.canvas.draw_idle()
+        return artists
+
+    def _series(self, symbol: str) -> tuple[np.ndarray, np.ndarray]:
+        """Close times (matplotlib dates) and close prices of the last window candlesticks plus the live price."""
+        candles = self.candles[symbol]
+        times, prices = candles['close_time'][-self.window:], candles['close'][-self.window:]
+        size = min(len(times), len(prices))  # Candles may be appended by the stream thread in between
+        times, prices = times[-size:] / MS_PER_DAY, prices[-size:]
+        if symbol in self.live_price:
+            live_time, live_price = self.live_price[symbol]
+            if not size or live_time / MS_PER_DAY > times[-1]:
+                times, prices = np.append(times, live_time / MS_PER_DAY), np.append(prices, live_price)
+        return times, prices
+
+    def _out_of_limits(self, axis, times: np.ndarray, prices: np.ndarray) -> bool:
+        """Move axis limits if the series left them, return True if they changed."""
+        (x_min, x_max), (y_min, y_max) = axis.get_xlim(), axis.get_ylim()
+        if times[0] >= x_min and times[-1] <= x_max and prices.min() >= y_min and prices.max() <= y_max:
+            return False
+        span = max(times[-1] - times[0], 1 / 1440)
+        margin = max(prices.max() - prices.min(), prices[-1] * 0.001) * 0.1
+        axis.set_xlim(times[0], times[-1] + span * 0.25)  # Headroom so the axes are not redrawn on every new point
+        axis.set_ylim(prices.min() - margin, prices.max() + margin)
+        return True
+
+    def _update_trades(self) -> None:
+        """Set trade markers of every symbol."""
+        trade_df = pd.DataFrame(self.trades, columns=['Symbol', 'Side', 'Price', 'Time'])
+        trade_df['Time'] = trade_df['Time'].map(_trade_time_ms) / MS_PER_DAY
+        for symbol in self.symbols:
+            for side, markers in (('BUY', self.buys[symbol]), ('SELL', self.sells[symbol])):
+                trades = trade_df.loc[(trade_df['Symbol'] == symbol) & (trade_df['Side'] == side)]
+                markers.set_data(trades['Time'].to_numpy(), trades['Price'].to_numpy())
+
+
+def _trade_time_ms(value) -> float:
+    """Trade time in ms since epoch, live orders log local time strings and backtests candlestick close times."""
+    if isinstance(value, str):
+        return time.mktime(time.strptime(value, '%Y-%m-%d %H:%M')) * 1000
+    return pd.Timestamp(value).value / 1e6
@@ -0,0 +1,69 @@
+"""Checkpoints"""
+
+import json
+import os
+from dataclasses import dataclass
+
+import numpy as np
+
+from binancetrading.account import Account
+from binancetrading.candles import CandleBuffer
+from binancetrading.orders import LimitOrder
+
+ACCOUNT_FIELDS = ('position', 'cash_position', 'commissions', 'init_wealth', 'wealth')
+
+
+@dataclass
+class Checkpoint:
+    """Trading bot state loaded from a snapshot."""
+
+    meta: dict
+    columns: dict[str, np.ndarray]
+    account: dict[str, float]
+    trades: list[dict]
+    live_orders: list[dict]  # Last booked status and commission of each open live limit order
+
+    def restore(self, candles: CandleBuffer, account: Account, live_orders: dict[int, LimitOrder]) -> None:
+        """Load candlesticks into buffer, positions and trade journal into account and open live orders, so later fills get booked."""
+        candles.load(self.columns)
+        for name, value in self.account.items():
+            setattr(account, name, value)
+        account.trades[:] = self.trades
+        for item in self.live_orders:
+            order = LimitOrder(item['confirmation'], item['commission'])
+            live_orders[order.order_id] = order
+
+
+def save_checkpoint(path: str, meta: dict, candles: CandleBuffer, account: Account, live_orders: dict[int, LimitOrder]) -> None:
+    """Write candlesticks, positions, trade journal and open live orders to a binary snapshot.
+    The snapshot is written to a temporary file and moved over path, so a crash never leaves a partial file."""
+    arrays = {f'candle_{name}': column for name, column in candles.columns().items()}
+    arrays['account'] = np.array([getattr(account, name) for name in ACCOUNT_FIELDS], dtype=np.float64)
+    arrays['trades'] = _json_bytes(account.trades)
+    arrays['live_orders'] = _json_bytes([{'confirmation': order.confirmation, 'commission': order.commission} for order in live_orders.values()])
+    arrays['meta'] = _json_bytes(meta)
+    _savez_atomic(path, arrays)
+
+
+def load_checkpoint(path: str) -> Checkpoint:
+    """Read snapshot written by save_checkpoint."""
+    with np.load(path, allow_pickle=False) as snapshot:
+        columns = {name[len('candle_'):]: snapshot[name] for name in snapshot.files if name.startswith('candle_')}
+        account = dict(zip(ACCOUNT_FIELDS, snapshot['account'].tolist()))
+        live_orders = json.loads(snapshot['live_orders'].tobytes()) if 'live_orders' in snapshot.files else []
+        return Checkpoint(json.loads(snapshot['meta'].tobytes()), columns, account, json.loads(snapshot['trades'].tobytes()), live_orders)
+
+
+def _savez_atomic(path: str, arrays: dict[str, np.ndarray]) -> None:
+    """Write arrays to an npz file through a temporary file, so readers never see a partial file."""
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as file:
+        np.savez(file, **arrays)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
+
+def _json_bytes(obj) -> np.ndarray:
+    """Encode object as JSON in a byte array, timestamps are stored as strings."""
+    return np.frombuffer(json.dumps(obj, default=str).encode('utf-8'), dtype=np.uint8)
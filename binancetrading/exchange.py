@@ -3,68 +3,165 @@
 
 import threading
 import time
-from typing import Callable
+from typing import TYPE_CHECKING, Callable, Optional, Union
 
 import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
 
 from binance.error import ClientError
 from binance.spot import Spot
-from binance.websocket.spot.websocket_client import SpotWebsocketClient
 
-from binancetrading.account import Account, log_msg
-from binancetrading.orders import MarketOrder, PaperOrder
+from binancetrading.account import Account, BaseAccount, log_msg
+from binancetrading.candles import Kline
+from binancetrading.fills import FillModel
+from binancetrading.matching import MatchingEngine
+from binancetrading.orders import LimitOrder, MarketOrder, OCOOrder, PaperOrder
+from binancetrading.scheduler import DEFAULT_SCHEDULER, RequestScheduler
+
+if TYPE_CHECKING:
+    from binancetrading.bus import CandleBusReader
 
 
 class Exchange:
     """Exchange class."""
 
-    def __init__(self, wsurl: str = 'wss://stream.binance.com:9443/ws') -> None:
-        self.websocketclient = SpotWebsocketClient(stream_url=wsurl)
+    def __init__(self, wsurl: str = 'wss://stream.binance.com:9443/ws', fill_model: Optional[FillModel] = None, apiurl: str = 'https://api.binance.com',
+                 scheduler: Optional[RequestScheduler] = None) -> None:
+        self.wsurl = wsurl
+        self._websocketclient = None
+        self.apiurl = apiurl
+        self.client = Spot(base_url=apiurl)  # Market data client, its HTTP session keeps connections alive between calls
+        self.scheduler = scheduler or DEFAULT_SCHEDULER
+        self.fill_model = fill_model
+        self.matching_engine = MatchingEngine()
+        self.live_orders: dict[int, LimitOrder] = {}  # Open live limit orders, as last booked
         self.event = threading.Event()
         self.connection: TimedValue = TimedValue(0)
 
-    def execute_order(self, account: Account, symbol: str, side: str, ammount: float, commission: float, paper_trade: bool) -> None:
-        """Send market execution order to Binance or execute paper trade."""
+    @property
+    def websocketclient(self):
+        """WebSocket client, created on first use so data and backtest scripts do not import the websocket stack."""
+        if self._websocketclient is None:
+            from binance.websocket.spot.websocket_client import SpotWebsocketClient
+            self._websocketclient = SpotWebsocketClient(stream_url=self.wsurl)
+        return self._websocketclient
+
+    def execute_order(self, account: Account, symbol: str, side: str, ammount: float, commission: float, paper_trade: bool,
+                      price: Optional[float] = None, data: Optional[pd.DataFrame] = None) -> None:
+        """Send market execution order to Binance or execute paper trade.
+        Paper trades are filled at price if given, else at the ticker price adjusted by the fill model."""
         params = {"symbol": symbol, "side": side, "type": "MARKET", "quantity": str(ammount)}
         try:
             if not paper_trade:
-                confirmation = account.client.new_order(**params)
+                confirmation = account.scheduler.call(account.client.new_order, **params)
                 order = MarketOrder(confirmation, commission)
             else:
                 order = PaperOrder(params, commission)
-                order.set_price(float(account.client.ticker_price(symbol)['price']))
-                self._check_paper_order(account, order.side, order.price, order.qty)
+                order.set_price(price if price is not None else self._paper_fill_price(account, symbol, side, ammount, data))
+                _check_paper_order(account, order.side, order.price, order.qty)
             account.trades.append(order.order_dict)
             account._refresh_positions(order.side, order.price, order.qty, order.commission)
             log_msg(str(order), verb=True)
         except ClientError as error:
             log_msg(f'{side} order could not be executed. {error.error_message} {error.status_code} {error.error_code}', verb=True)
 
+    def limit_order(self, account: Account, symbol: str, side: str, ammount: float, price: float, commission: float, paper_trade: bool) -> Optional[int]:
+        """Send limit order to Binance or rest it in the local matching engine, return order id."""
+        params = {"symbol": symbol, "side": side, "type": "LIMIT", "timeInForce": "GTC", "quantity": str(ammount), "price": str(price), "newOrderRespType": "FULL"}
+        try:
+            if not paper_trade:
+                return self._record_limit_order(account, LimitOrder(account.scheduler.call(account.client.new_order, **params), commission))
+            order_id = self.matching_engine.submit_limit(symbol, side, ammount, price, commission)
+            log_msg(f'Paper order {order_id}: LIMIT {side} {ammount:,.4f} {symbol} limit ${price:,.2f}', verb=True)
+            return order_id
+        except ClientError as error:
+            log_msg(f'{side} limit order could not be placed. {error.error_message} {error.status_code} {error.error_code}', verb=True)
+            return None
+
+    def stop_limit_order(self, account: Account, symbol: str, side: str, ammount: float, stop_price: float, price: float, commission: float, paper_trade: bool) -> Optional[int]:
+        """Send stop limit order to Binance or rest it in the local matching engine, return order id."""
+        params = {"symbol": symbol, "side": side, "type": "STOP_LOSS_LIMIT", "timeInForce": "GTC", "quantity": str(ammount),
+                  "price": str(price), "stopPrice": str(stop_price), "newOrderRespType": "FULL"}
+        try:
+            if not paper_trade:
+                return self._record_limit_order(account, LimitOrder(account.scheduler.call(account.client.new_order, **params), commission))
+            order_id = self.matching_engine.submit_stop_limit(symbol, side, ammount, stop_price, price, commission)
+            log_msg(f'Paper order {order_id}: STOP_LOSS_LIMIT {side} {ammount:,.4f} {symbol} limit ${price:,.2f} stop ${stop_price:,.2f}', verb=True)
+            return order_id
+        except ClientError as error:
+            log_msg(f'{side} stop limit order could not be placed. {error.error_message} {error.status_code} {error.error_code}', verb=True)
+            return None
+
+    def oco_order(self, account: Account, symbol: str, side: str, ammount: float, price: float, stop_price: float, stop_limit_price: float,
+                  commission: float, paper_trade: bool) -> Optional[tuple[int, int]]:
+        """Send one-cancels-the-other order to Binance or rest it in the local matching engine, return limit and stop order ids."""
+        try:
+            if not paper_trade:
+                confirmation = account.scheduler.call(account.client.new_oco_order, symbol, side, str(ammount), str(price), str(stop_price), stopLimitPrice=str(stop_limit_price),
+                                                            stopLimitTimeInForce='GTC', newOrderRespType='FULL')
+                oco = OCOOrder(confirmation, commission)
+                log_msg(str(oco), verb=True)
+                limit_id, stop_id = [self._record_limit_order(account, order, verbose=False) for order in oco.orders]
+                return limit_id, stop_id
+            order_ids = self.matching_engine.submit_oco(symbol, side, ammount, price, stop_price, stop_limit_price, commission)
+            log_msg(f'Paper OCO order {order_ids}: {side} {ammount:,.4f} {symbol} limit ${price:,.2f} stop ${stop_price:,.2f} stop limit ${stop_limit_price:,.2f}', verb=True)
+            return order_ids
+        except ClientError as error:
+            log_msg(f'{side} OCO order could not be placed. {error.error_message} {error.status_code} {error.error_code}', verb=True)
+            return None
+
+    def cancel_order(self, account: Account, symbol: str, order_id: int, paper_trade: bool) -> bool:
+        """Cancel open order, return False if it could not be cancelled."""
+        try:
+            if not paper_trade:
+                account.scheduler.call(account.client.cancel_order, symbol, orderId=order_id)
+                return True  # Fills made before the cancel are booked by the next reconcile_orders
+            return self.matching_engine.cancel(order_id)
+        except ClientError as error:
+            log_msg(f'Order {order_id} could not be cancelled. {error.error_message} {error.status_code} {error.error_code}', verb=True)
+            return False
+
     def kline_df(self, coin: str, interval: str, lookback: int) -> pd.DataFrame:
         """Return DataFrame with historic candlestick data."""
         symbol = coin + 'USDT'
-        client = Spot()
-        kline_data = client.klines(symbol, interval, limit=lookback, endTime=int(time.time() * 1000 - 60000))
+        kline_data = self.scheduler.call(self.client.klines, symbol, interval, limit=lookback, endTime=int(time.time() * 1000 - 60000))
         return _candle_data_to_df(kline_data, symbol, interval)
 
-    def live_chart(self, coin: str, interval: str, refreshrate: int = 2000) -> None:
-        """Plot live chart of selected coin."""
-        symbol = coin + 'USDT'
-        client = Spot()
-
-        def animate(_):
-            data = _candle_data_to_df(client.klines(symbol, interval, limit=120), symbol, interval)
-            plt.cla()
-            plt.plot(data['Close time'], data['Close price'])
-            plt.gcf().autofmt_xdate()
-            plt.gca().yaxis.set_major_formatter('{x:,.2f}')
-            plt.xlabel('Time')
-            plt.ylabel('Price')
-            plt.title(symbol, y=1.05, fontsize=16)
-        _ = FuncAnimation(plt.gcf(), animate, refreshrate)
-        plt.show()
+    def kline_dfs(self, coins: list[str], interval: str, lookback: int) -> dict[str, pd.DataFrame]:
+        """Return DataFrames with historic candlestick data of several coins, fetched concurrently with AsyncExchange.
+        Called while an event loop is running, as in Jupyter notebooks, the requests run on their own loop in a worker thread;
+        coroutines can await AsyncExchange.kline_dfs directly instead."""
+        import asyncio
+        from concurrent.futures import ThreadPoolExecutor
+        from binancetrading.aio import AsyncExchange
+
+        async def fetch() -> dict[str, pd.DataFrame]:
+            exchange = AsyncExchange(self.wsurl, self.apiurl, scheduler=self.scheduler)  # Shares the request weight of this exchange
+            try:
+                return await exchange.kline_dfs(coins, interval, lookback)
+            finally:
+                await exchange.close()
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:  # No running loop in this thread
+            return asyncio.run(fetch())
+        with ThreadPoolExecutor(1) as pool:
+            return pool.submit(asyncio.run, fetch()).result()
+
+    def live_chart(self, coins: Union[str, list[str]], interval: str, refreshrate: int = 1000, window: int = 120) -> None:
+        """Plot live chart of selected coins, fed by the kline WebSocket stream after one REST call per coin for the history."""
+        from binancetrading.chart import LiveChart
+        symbols = [coin + 'USDT' for coin in ([coins] if isinstance(coins, str) else coins)]
+        chart = LiveChart(symbols, interval, window)
+        for symbol in symbols:
+            for kline in self._init_candles(symbol, interval, window):
+                chart.candles[symbol].append_kline(kline)
+        self.websocketclient.start()
+        for stream_id, symbol in enumerate(symbols, 1):
+            self.websocketclient.kline(symbol=symbol, interval=interval, id=stream_id, callback=chart.ws_handler)
+        try:
+            chart.show(refreshrate)
+        finally:
+            self.websocketclient.stop()
 
     def exit_positions(self, account: Account, symbol: str, paper_trade: bool) -> None:
         """Exit positions of a coin."""
@@ -73,31 +170,99 @@ class Exchange:
         log_msg(f'Exiting {1 - percentage_to_sell}% of {symbol} positions.')
         self.execute_order(account, symbol, 'SELL', to_sell, 0.0, paper_trade)
 
-    def _check_paper_order(self, account: Account, side: str, price: float, ammount: float) -> None:
-        """Check if a paper order can be executed based on current cash and coin positions."""
-        if price * ammount <= 10:  # Minimum order size
-            raise ClientError('', '', 'Order to small.', '')
-        if side == 'BUY' and account.cash_position < ammount * price:  # Check available funds
-            raise ClientError('', '', 'Not enough funds.', '')
-        if side == 'SELL' and account.position < ammount:  # Check available crypto currency
-            raise ClientError('', '', 'Not enough funds.', '')
-
-    def _connect_ws(self, account: Account, handler: Callable[[dict], None], symbol: str, interval: str, duration: int) -> None:
-        """Connect to WebSocket."""
+    def _paper_fill_price(self, account: Account, symbol: str, side: str, ammount: float, data: Optional[pd.DataFrame]) -> float:
+        """Get fill price of a paper order from the ticker price and the fill model."""
+        price = float(account.scheduler.call(account.client.ticker_price, symbol)['price'])
+        if self.fill_model is None:
+            return price
+        return self.fill_model.fill_price(side, ammount, price, data)
+
+    def reconcile_orders(self, account: Account) -> int:
+        """Poll open live limit orders and refresh positions with the quantity executed since they were last booked, return number of fills."""
+        fills = 0
+        for order_id, order in list(self.live_orders.items()):
+            try:
+                status = LimitOrder(account.scheduler.call(account.client.get_order, order.symbol, orderId=order_id), order.commission)
+            except ClientError as error:
+                log_msg(f'Order {order_id} status could not be queried. {error.error_message} {error.status_code} {error.error_code}', verb=True)
+                continue
+            fill = status.fill_since(order)
+            if fill:
+                account.trades.append(fill)
+                account._refresh_positions(fill['Side'], fill['Price'], fill['Quantity'], status.commission)
+                log_msg(f'Order {order_id} filled {fill["Quantity"]:,.4f} {fill["Symbol"]} at ${fill["Price"]:,.2f}, {status.status}', verb=True)
+                fills += 1
+            if status.is_open:
+                self.live_orders[order_id] = status
+            else:
+                del self.live_orders[order_id]
+        return fills
+
+    def _record_limit_order(self, account: Account, order: LimitOrder, verbose: bool = True) -> int:
+        """Log live limit order, refresh positions with the quantity executed on placement and track it while open."""
+        if verbose:
+            log_msg(str(order), verb=True)
+        if order.executed_qty:
+            account.trades.append(order.order_dict)
+            account._refresh_positions(order.side, order.price, order.executed_qty, order.commission)
+        if order.is_open:
+            self.live_orders[order.order_id] = order
+        return order.order_id
+
+    def _match_paper_orders(self, account: Account, symbol: str, open_price: float, high_price: float, low_price: float) -> int:
+        """Match resting paper orders against a candlestick and refresh positions, return number of filled orders."""
+        filled = 0
+        for resting, price in self.matching_engine.match(symbol, open_price, high_price, low_price):
+            order = PaperOrder({'symbol': symbol, 'side': resting.side, 'quantity': str(resting.qty)}, resting.commission)
+            order.set_price(price)
+            try:
+                _check_paper_order(account, order.side, order.price, order.qty)
+            except ClientError as error:
+                log_msg(f'Paper order {resting.order_id} could not be filled. {error.error_message}', verb=True)
+                continue
+            account.trades.append(order.order_dict)
+            account._refresh_positions(order.side, order.price, order.qty, order.commission)
+            log_msg(str(order), verb=True)
+            filled += 1
+        return filled
+
+    def _connect_ws(self, account: Account, handler: Callable[[dict], None], symbol: str, interval: str, duration: int, stale_after: float = 60.0,
+                    raw_handler: Optional[Callable[[bytes], None]] = None) -> None:
+        """Connect to WebSocket and supervise the stream, reconnecting with backoff if it drops or goes quiet for stale_after seconds.
+        With raw_handler, stream messages are passed to it as raw bytes instead of being parsed into dictionaries for handler."""
         self.websocketclient.start()
-        self.websocketclient.kline(
-            symbol=symbol,
-            interval=interval,
-            id=1,
-            callback=handler)
+        stream = _KlineStream(self, handler, symbol, interval, stale_after=stale_after, raw_handler=raw_handler)
+        stream.subscribe()
+        self.connection = TimedValue(duration)
+        try:
+            while self.connection.is_running and not self.event.is_set():
+                stream.supervise()
+                self.event.wait(1)
+        except KeyboardInterrupt:
+            log_msg('KeyboardInterrupt', verb=True)
+            self.event.set()
+        self._close_connection(account, symbol)
+
+    def _connect_bus(self, account: Account, handler: Callable[[Kline], None], reader: 'CandleBusReader', symbol: str, duration: int, poll: float = 0.2,
+                     stale_after: float = 120.0) -> bool:
+        """Read candlesticks published to shared memory by a CandleBusPublisher instead of opening a WebSocket.
+        Return False, leaving the session open, if the publisher died or has not heard from the stream for stale_after seconds."""
         self.connection = TimedValue(duration)
         try:
             while self.connection.is_running and not self.event.is_set():
-                pass
+                for kline in reader.poll():
+                    handler(kline)
+                if not reader.is_live(stale_after):
+                    log_msg(f'Candle bus publisher of {symbol} is down or stale.', verb=True)
+                    reader.close()
+                    return False
+                self.event.wait(poll)
         except KeyboardInterrupt:
             log_msg('KeyboardInterrupt', verb=True)
             self.event.set()
+        reader.close()
         self._close_connection(account, symbol)
+        return True
 
     def _close_connection(self, account: Account, symbol: str) -> None:
         """Close connection to WebSocket, print current positions and deals made this session."""
@@ -106,18 +271,29 @@ class Exchange:
         account._value_positions(symbol)
         log_msg(f'Return: {account.wealth - account.init_wealth:.2f} ({(account.wealth / account.init_wealth - 1) * 100:.2f}%)', verb=True)
         log_msg(f'Finished at: {time.strftime("%Y-%m-%d %H:%M", time.localtime())}', verb=True)
-        self.websocketclient.stop()
+        if self._websocketclient is not None:
+            self.websocketclient.stop()
 
     def _init_candles(self, symbol: str, interval: str, lookback: int) -> list[dict]:
         """Get historic data for strategies that need to look back to function."""
-        client = Spot()
-        kline_data = client.klines(symbol, interval, limit=lookback, endTime=int(time.time() * 1000 - 60000))
+        kline_data = self.scheduler.call(self.client.klines, symbol, interval, limit=lookback, endTime=int(time.time() * 1000 - 60000))
         return _candle_data_to_list(kline_data, symbol, interval)
 
+    def _backfill_candles(self, symbol: str, interval: str, start_time: int, end_time: int) -> list[dict]:
+        """Get candlesticks opened between start and end time (ms), to fill gaps in the stream."""
+        candle_list: list[dict] = []
+        while start_time <= end_time:
+            kline_data = self.scheduler.call(self.client.klines, symbol, interval, startTime=start_time, endTime=end_time, limit=1000)
+            candle_list.extend(_candle_data_to_list(kline_data, symbol, interval))
+            if len(kline_data) < 1000:
+                break
+            start_time = kline_data[-1][0] + 1
+        return candle_list
+
     def _get_commission(self, account: Account, symbol: str) -> float:
         """Get commission for a coin."""
         try: # Try except needed because testnet has no commission atribute
-            commission_list = account.client.trade_fee()
+            commission_list = account.scheduler.call(account.client.trade_fee)
         except ClientError:
             return 0.0
         for item in commission_list:
@@ -126,22 +302,50 @@ class Exchange:
         return 0.0
 
 
+def _check_paper_order(account: BaseAccount, side: str, price: float, ammount: float) -> None:
+    """Check if a paper order can be executed based on current cash and coin positions."""
+    if price * ammount <= 10:  # Minimum order size
+        raise ClientError('', '', 'Order to small.', '')
+    if side == 'BUY' and account.cash_position < ammount * price:  # Check available funds
+        raise ClientError('', '', 'Not enough funds.', '')
+    if side == 'SELL' and account.position < ammount:  # Check available crypto currency
+        raise ClientError('', '', 'Not enough funds.', '')
+
+
+def _subscribe_raw(websocketclient, stream: str, subscribe: Callable[[], None]) -> bool:
+    """Subscribe on the connector reactor thread and make the new client factory pass raw message bytes to its callback, skipping the connector's
+    json parsing. The connection is queued on the reactor thread too, so it is only built once the factory is patched.
+    Connector status messages, like the error sent after the last reconnect attempt, still reach the callback as dictionaries.
+    Return False, with messages left parsed, if the connector has no such factory."""
+    try:
+        from twisted.internet import reactor, threads
+        from binance.websocket.binance_client_protocol import BinanceClientProtocol
+    except ImportError:
+        subscribe()
+        return False
+
+    class RawMessageProtocol(BinanceClientProtocol):
+        def onMessage(self, payload, isBinary):
+            if not isBinary:
+                self.factory.callback(payload)
+
+    def subscribe_raw() -> bool:
+        subscribe()
+        factory = getattr(websocketclient, 'factories', {}).get(stream)
+        if factory is None or not hasattr(factory, 'payload'):
+            return False
+        factory.buildProtocol = lambda addr: RawMessageProtocol(factory, payload=factory.payload)
+        return True
+
+    return threads.blockingCallFromThread(reactor, subscribe_raw)
+
+
 # Helper functions to manipulate binance streaming data
 
-def _refresh_candles(candle: dict, candlelist: list[dict], max_len: int = 10000) -> tuple[list[dict], bool]:
-    """Recieve candlestick data and append to candlestick list if it is new candlestick."""
-    changed = False
-    if candle['k']['x']:
-        if candlelist:
-            if candle['k']['t'] != candlelist[-1]['t']:
-                candlelist.append(candle['k'])
-                changed = True
-                if len(candlelist) > max_len:
-                    candlelist.pop(0)
-        else:
-            candlelist.append(candle['k'])
-            changed = True
-    return candlelist, changed
+def _interval_ms(interval: str) -> int:
+    """Length of a kline interval in milliseconds, 0 for monthly klines which have no fixed length."""
+    units = {'s': 1000, 'm': 60_000, 'h': 3_600_000, 'd': 86_400_000, 'w': 604_800_000}
+    return int(interval[:-1]) * units.get(interval[-1], 0)
 
 
 def _candle_list_to_df(candle_list: list[dict]) -> pd.DataFrame:
@@ -208,6 +412,70 @@ def _candle_data_to_df(candledata: list[list], symbol: str, interval: str) -> pd
                       'High price', 'Low price', 'Base asset volume', 'Number of trades']]
 
 
+class _KlineStream:
+    """Kline stream of one symbol on the exchange WebSocket client, reopened with exponential backoff if it drops or goes quiet.
+    Stream events refresh the last message time and connector errors, sent once it gives up reconnecting, flag a reconnect."""
+
+    def __init__(self, exchange: Exchange, handler: Callable[[dict], None], symbol: str, interval: str, stream_id: int = 1, stale_after: float = 60.0,
+                 raw_handler: Optional[Callable[[bytes], None]] = None) -> None:
+        self.exchange = exchange
+        self.handler = handler
+        self.raw_handler = raw_handler
+        self.symbol = symbol
+        self.interval = interval
+        self.stream_id = stream_id
+        self.stale_after = stale_after
+        self.reconnect = threading.Event()
+        self.last_message: float = 0.0  # Time of the last stream message
+        self.subscribed_at: float = 0.0  # Time the stream was last (re)opened
+        self.reconnects = 0
+        self.retry_at: float = 0.0  # Time of the pending reconnect, 0 if none
+
+    def subscribe(self) -> None:
+        """(Re)open kline stream."""
+        websocketclient = self.exchange.websocketclient
+        stream = f'{self.symbol.lower()}@kline_{self.interval}'
+        websocketclient.stop_socket(stream)
+        self.reconnect.clear()
+        self.subscribed_at = time.time()
+        def subscribe() -> None:
+            websocketclient.kline(symbol=self.symbol, interval=self.interval, id=self.stream_id, callback=self._supervised_handler)
+        if self.raw_handler is None:
+            subscribe()
+        elif not _subscribe_raw(websocketclient, stream, subscribe):
+            log_msg('WebSocket client cannot pass raw messages, using parsed messages.')
+            self.raw_handler = None
+
+    def supervise(self) -> None:
+        """Schedule a reconnect if the stream dropped or went quiet for stale_after seconds and reopen it once the backoff has passed."""
+        now = time.time()
+        if self.retry_at:
+            if now >= self.retry_at:
+                self.retry_at = 0.0
+                self.subscribe()
+        elif self.reconnect.is_set() or now - max(self.last_message, self.subscribed_at) > self.stale_after:
+            self.reconnects += 1
+            delay = min(2 ** self.reconnects, 60)
+            log_msg(f'{self.symbol} WebSocket connection lost, reconnecting in {delay}s (attempt {self.reconnects}).', verb=True)
+            self.retry_at = now + delay
+        elif self.reconnects and self.last_message > self.subscribed_at:  # A message arrived on the new stream
+            log_msg(f'{self.symbol} WebSocket connection restored.', verb=True)
+            self.reconnects = 0
+
+    def _supervised_handler(self, msg: Union[bytes, dict]) -> None:
+        if isinstance(msg, bytes):  # Raw stream message
+            if b'"e"' in msg:
+                self.last_message = time.time()
+            self.raw_handler(msg)
+            return
+        if msg.get('e') == 'error':  # Connector gave up reconnecting
+            self.reconnect.set()
+            return
+        if 'e' in msg:  # Stream event, not a connector status message
+            self.last_message = time.time()
+        self.handler(msg)
+
+
 class TimedValue:
     """Timed value class."""
 
@@ -215,6 +483,11 @@ class TimedValue:
         self.duration = duration
         self.started_at = time.time()
 
+    @property
+    def remaining(self) -> float:
+        """Seconds left before the instance expires."""
+        return max(self.duration - (time.time() - self.started_at), 0.0)
+
     @property
     def is_running(self) -> bool:
         """Check if instance has expired."""
@@ -0,0 +1,106 @@
+"""Fill Models"""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+
+class FillModel(ABC):
+    """Fill model base class, estimates the price a paper order would get filled at."""
+
+    @abstractmethod
+    def __str__(self) -> str:
+        """Returns name of fill model."""
+
+    @abstractmethod
+    def fill_prices(self, side: str, qty: float, prices: np.ndarray, data: Optional[pd.DataFrame] = None) -> np.ndarray:
+        """Return fill prices of an order of given side and quantity for each reference price in prices.
+        If given, data holds the candlesticks aligned with prices."""
+
+    def fill_price(self, side: str, qty: float, price: float, data: Optional[pd.DataFrame] = None) -> float:
+        """Return fill price of a single order, data last candlestick is used as reference."""
+        candle = None if data is None else data.iloc[-1:]
+        return float(self.fill_prices(side, qty, np.array([price], dtype=float), candle)[0])
+
+
+def _side_sign(side: str) -> float:
+    """Buy orders get filled above the reference price and sell orders below it."""
+    return 1.0 if side == 'BUY' else -1.0
+
+
+@dataclass
+class FixedBpsFill(FillModel):
+    """Fixed slippage of a number of basis points against the order."""
+
+    bps: float = 5.0
+
+    def __str__(self) -> str:
+        return f'Fixed Fill (bps={self.bps})'
+
+    def fill_prices(self, side: str, qty: float, prices: np.ndarray, data: Optional[pd.DataFrame] = None) -> np.ndarray:
+        return np.asarray(prices, dtype=float) * (1 + _side_sign(side) * self.bps / 10_000)
+
+
+@dataclass
+class VolumeFill(FillModel):
+    """Volume participation fill: slippage grows with the share of the candlestick volume taken by the order.
+    slippage = bps + impact * participation ** exponent, with participation capped at max_participation."""
+
+    bps: float = 1.0
+    impact: float = 0.1
+    exponent: float = 0.5
+    max_participation: float = 1.0
+
+    def __str__(self) -> str:
+        return f'Volume Fill (bps={self.bps}, impact={self.impact}, exponent={self.exponent})'
+
+    def fill_prices(self, side: str, qty: float, prices: np.ndarray, data: Optional[pd.DataFrame] = None) -> np.ndarray:
+        prices = np.asarray(prices, dtype=float)
+        slippage = np.full(prices.shape, self.bps / 10_000)
+        if data is not None:
+            volume = data['Base asset volume'].to_numpy(dtype=float)
+            participation = np.divide(qty, volume, out=np.full(volume.shape, self.max_participation), where=volume > 0)
+            slippage += self.impact * np.minimum(participation, self.max_participation) ** self.exponent
+        return prices * (1 + _side_sign(side) * slippage)
+
+
+@dataclass
+class DepthFill(FillModel):
+    """Order book fill: walk recorded order book levels until the order quantity is filled.
+    book_times holds the time (ms) of each book snapshot, bids and asks have shape (snapshots, levels, 2)
+    with price and quantity of each level, best level first. Each candlestick uses the latest snapshot
+    taken at or before its close time. Quantity beyond the recorded depth is filled at the last level."""
+
+    book_times: np.ndarray
+    bids: np.ndarray
+    asks: np.ndarray
+    _cum_qty: dict = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.book_times = np.asarray(self.book_times, dtype=np.int64)
+        self.bids = np.asarray(self.bids, dtype=float)
+        self.asks = np.asarray(self.asks, dtype=float)
+        self._cum_qty = {'BUY': np.cumsum(self.asks[:, :, 1], axis=1), 'SELL': np.cumsum(self.bids[:, :, 1], axis=1)}
+
+    def __str__(self) -> str:
+        return f'Depth Fill ({len(self.book_times)} snapshots, {self.bids.shape[1]} levels)'
+
+    def _snapshots(self, data: Optional[pd.DataFrame], size: int) -> np.ndarray:
+        """Index of the book snapshot to use for each candlestick."""
+        if data is None:
+            return np.full(size, len(self.book_times) - 1)
+        close_times = data['Close time'].to_numpy(dtype='datetime64[ms]').astype(np.int64)
+        return np.clip(np.searchsorted(self.book_times, close_times, side='right') - 1, 0, None)
+
+    def fill_prices(self, side: str, qty: float, prices: np.ndarray, data: Optional[pd.DataFrame] = None) -> np.ndarray:
+        snapshots = self._snapshots(data, len(prices))
+        book = self.asks[snapshots] if side == 'BUY' else self.bids[snapshots]
+        cum_qty = self._cum_qty[side][snapshots]
+        prev_qty = np.concatenate([np.zeros((len(snapshots), 1)), cum_qty[:, :-1]], axis=1)
+        taken = np.clip(qty - prev_qty, 0, book[:, :, 1])
+        remainder = np.maximum(qty - cum_qty[:, -1], 0)
+        cost = (taken * book[:, :, 0]).sum(axis=1) + remainder * book[:, -1, 0]
+        return cost / qty
@@ -0,0 +1,165 @@
+"""Matching Engine"""
+
+import heapq
+import itertools
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+
+@dataclass
+class RestingOrder:
+    """Paper limit or stop limit order waiting in the matching engine."""
+
+    order_id: int
+    symbol: str
+    side: str
+    qty: float
+    price: float
+    commission: float
+    stop_price: float = 0.0
+    oco_id: int = 0
+
+    @property
+    def order_dict(self) -> dict:
+        """Order details."""
+        return {'Id': self.order_id, 'Symbol': self.symbol, 'Side': self.side, 'Price': self.price, 'Stop price': self.stop_price, 'Quantity': self.qty}
+
+
+class _Book:
+    """Price sorted heaps of the resting orders of one symbol.
+    Heap keys are negated where the best order is the one with the highest price."""
+
+    def __init__(self) -> None:
+        self.buy_limits: list[tuple[float, int, int]] = []   # Highest price first, fills when low <= price
+        self.sell_limits: list[tuple[float, int, int]] = []  # Lowest price first, fills when high >= price
+        self.buy_stops: list[tuple[float, int, int]] = []    # Lowest stop first, triggers when high >= stop
+        self.sell_stops: list[tuple[float, int, int]] = []   # Highest stop first, triggers when low <= stop
+        self.stale: int = 0
+
+    def heaps(self) -> list[list[tuple[float, int, int]]]:
+        """All heaps of the book."""
+        return [self.buy_limits, self.sell_limits, self.buy_stops, self.sell_stops]
+
+
+class MatchingEngine:
+    """Local matching engine for paper limit, stop limit and OCO orders.
+    Resting orders are kept in heaps per symbol, so matching a candlestick only touches the orders it fills."""
+
+    def __init__(self) -> None:
+        self._books: dict[str, _Book] = {}
+        self._orders: dict[int, RestingOrder] = {}
+        self._oco: dict[int, list[int]] = {}
+        self._ids = itertools.count(1)
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def open_orders(self, symbol: Optional[str] = None) -> list[RestingOrder]:
+        """Resting orders, optionally of one symbol only."""
+        return [order for order in self._orders.values() if symbol is None or order.symbol == symbol]
+
+    def submit_limit(self, symbol: str, side: str, qty: float, price: float, commission: float = 0.0, oco_id: int = 0) -> int:
+        """Add limit order to the book, return its id."""
+        order = RestingOrder(next(self._ids), symbol, side, qty, price, commission, oco_id=oco_id)
+        self._orders[order.order_id] = order
+        self._push_limit(order)
+        return order.order_id
+
+    def submit_stop_limit(self, symbol: str, side: str, qty: float, stop_price: float, price: float, commission: float = 0.0, oco_id: int = 0) -> int:
+        """Add stop limit order to the book, it becomes a limit order once the stop price is reached. Return its id."""
+        order = RestingOrder(next(self._ids), symbol, side, qty, price, commission, stop_price=stop_price, oco_id=oco_id)
+        self._orders[order.order_id] = order
+        book = self._book(symbol)
+        if side == 'BUY':
+            heapq.heappush(book.buy_stops, (stop_price, next(self._seq), order.order_id))
+        else:
+            heapq.heappush(book.sell_stops, (-stop_price, next(self._seq), order.order_id))
+        return order.order_id
+
+    def submit_oco(self, symbol: str, side: str, qty: float, price: float, stop_price: float, stop_limit_price: float, commission: float = 0.0) -> tuple[int, int]:
+        """Add one-cancels-the-other pair of a limit and a stop limit order, return their ids."""
+        oco_id = next(self._ids)
+        limit_id = self.submit_limit(symbol, side, qty, price, commission, oco_id)
+        stop_id = self.submit_stop_limit(symbol, side, qty, stop_price, stop_limit_price, commission, oco_id)
+        self._oco[oco_id] = [limit_id, stop_id]
+        return limit_id, stop_id
+
+    def cancel(self, order_id: int) -> bool:
+        """Cancel resting order, return False if it is not in the book."""
+        order = self._orders.pop(order_id, None)
+        if order is None:
+            return False
+        book = self._books[order.symbol]
+        book.stale += 1
+        if book.stale > sum(len(heap) for heap in book.heaps()) // 2:
+            self._compact(book)
+        return True
+
+    def match(self, symbol: str, open_price: float, high_price: float, low_price: float) -> list[tuple[RestingOrder, float]]:
+        """Match resting orders of a symbol against a candlestick, return filled orders and their fill prices.
+        Limits fill at their price or better at the open, stops triggered in the candlestick fill from their stop price.
+        Stops are triggered before limits are filled, so when both legs of an OCO are reached the stop wins."""
+        book = self._books.get(symbol)
+        if book is None:
+            return []
+        triggered = {}
+        for order in self._pop_while(book, book.buy_stops, lambda key: key <= high_price):
+            triggered[order.order_id] = max(open_price, order.stop_price)
+            self._trigger(order)
+        for order in self._pop_while(book, book.sell_stops, lambda key: -key >= low_price):
+            triggered[order.order_id] = min(open_price, order.stop_price)
+            self._trigger(order)
+        fills = []
+        for order in self._pop_while(book, book.buy_limits, lambda key: -key >= low_price):
+            fills.append((order, min(order.price, triggered.get(order.order_id, open_price))))
+        for order in self._pop_while(book, book.sell_limits, lambda key: key <= high_price):
+            fills.append((order, max(order.price, triggered.get(order.order_id, open_price))))
+        for order, _ in fills:
+            self._cancel_oco(order)
+        return fills
+
+    def _book(self, symbol: str) -> _Book:
+        """Get book of a symbol, create it if needed."""
+        if symbol not in self._books:
+            self._books[symbol] = _Book()
+        return self._books[symbol]
+
+    def _push_limit(self, order: RestingOrder) -> None:
+        """Push order to its limit heap."""
+        book = self._book(order.symbol)
+        if order.side == 'BUY':
+            heapq.heappush(book.buy_limits, (-order.price, next(self._seq), order.order_id))
+        else:
+            heapq.heappush(book.sell_limits, (order.price, next(self._seq), order.order_id))
+
+    def _pop_while(self, book: _Book, heap: list[tuple[float, int, int]], condition: Callable[[float], bool]) -> list[RestingOrder]:
+        """Pop orders from the top of a heap while condition holds for their key, skipping cancelled ones."""
+        orders = []
+        while heap and (heap[0][2] not in self._orders or condition(heap[0][0])):
+            _, _, order_id = heapq.heappop(heap)
+            order = self._orders.pop(order_id, None)
+            if order is None:
+                book.stale -= 1
+            else:
+                orders.append(order)
+        return orders
+
+    def _trigger(self, order: RestingOrder) -> None:
+        """Turn triggered stop limit order into a resting limit order."""
+        self._orders[order.order_id] = order
+        self._cancel_oco(order)
+        self._push_limit(order)
+
+    def _cancel_oco(self, order: RestingOrder) -> None:
+        """Cancel the other leg of an OCO order."""
+        for order_id in self._oco.pop(order.oco_id, []):
+            if order_id != order.order_id:
+                self.cancel(order_id)
+
+    def _compact(self, book: _Book) -> None:
+        """Drop cancelled orders from the heaps of a book."""
+        for heap in book.heaps():
+            heap[:] = [item for item in heap if item[2] in self._orders]
+            heapq.heapify(heap)
+        book.stale = 0
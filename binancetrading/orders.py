@@ -3,6 +3,7 @@
 
 import time
 from dataclasses import dataclass
+from typing import Optional
 
 
 @dataclass
@@ -53,3 +54,71 @@ class PaperOrder:
     def order_dict(self) -> dict:
         """Order details."""
         return {'Symbol': self.symbol, 'Side': self.side, 'Price': self.price, 'Quantity': self.qty, 'Time': self.order_time}
+
+
+@dataclass
+class LimitOrder:
+    """Limit and stop limit order class."""
+
+    confirmation: dict[str, str]
+    commission: float
+
+    def __post_init__(self) -> None:
+        self.order_id = int(self.confirmation['orderId'])
+        self.symbol = self.confirmation['symbol']
+        self.side = self.confirmation['side']
+        self.type = self.confirmation['type']
+        self.status = self.confirmation['status']
+        self.qty = float(self.confirmation['origQty'])
+        self.executed_qty = float(self.confirmation['executedQty'])
+        self.quote_qty = float(self.confirmation['cummulativeQuoteQty'])
+        self.limit_price = float(self.confirmation['price'])
+        self.stop_price = float(self.confirmation.get('stopPrice', 0.0))
+        order_time = self.confirmation.get('transactTime', self.confirmation.get('updateTime'))  # Order status queries have no transactTime
+        self.order_time = time.strftime('%Y-%m-%d %H:%M', time.localtime(float(order_time) / 1000))
+        if self.executed_qty:
+            self.price = self.quote_qty / self.executed_qty
+        else:
+            self.price = self.limit_price
+
+    def __str__(self) -> str:
+        stop = f' stop ${self.stop_price:,.2f}' if self.stop_price else ''
+        return f'Order: {self.type} {self.side} {self.qty:,.4f} {self.symbol} limit ${self.limit_price:,.2f}{stop} {self.status} at {self.order_time}'
+
+    @property
+    def filled(self) -> bool:
+        """Check if order was completely filled."""
+        return self.status == 'FILLED'
+
+    @property
+    def is_open(self) -> bool:
+        """Check if order can still be filled."""
+        return self.status in ('NEW', 'PARTIALLY_FILLED')
+
+    def fill_since(self, previous: 'LimitOrder') -> Optional[dict]:
+        """Details of the quantity executed since a previous status of the order, None if nothing was."""
+        qty = self.executed_qty - previous.executed_qty
+        if qty <= 0:
+            return None
+        return {'Symbol': self.symbol, 'Side': self.side, 'Price': (self.quote_qty - previous.quote_qty) / qty, 'Quantity': qty, 'Time': self.order_time}
+
+    @property
+    def order_dict(self) -> dict:
+        """Order details."""
+        return {'Symbol': self.symbol, 'Side': self.side, 'Price': self.price, 'Quantity': self.executed_qty, 'Time': self.order_time}
+
+
+@dataclass
+class OCOOrder:
+    """One-cancels-the-other order class, pair of a limit maker and a stop limit order."""
+
+    confirmation: dict
+    commission: float
+
+    def __post_init__(self) -> None:
+        self.order_list_id = int(self.confirmation['orderListId'])
+        self.symbol = self.confirmation['symbol']
+        self.orders = [LimitOrder(report, self.commission) for report in self.confirmation['orderReports']]
+
+    def __str__(self) -> str:
+        return f'OCO order {self.order_list_id}:\n' + '\n'.join(str(order) for order in self.orders)
@@ -0,0 +1,189 @@
+"""Robustness Tests"""
+
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+from binancetrading.backtest import Backtest
+from binancetrading.fills import FixedBpsFill
+from binancetrading.strategies import RandomStrategy, TradingStrategy
+
+_BACKTEST: Optional[Backtest] = None  # Backtest of the current worker process
+_DATA: Optional[pd.DataFrame] = None
+
+
+@dataclass
+class RobustnessResult:
+    """Return and max drawdown of every run of a robustness test."""
+
+    kind: str
+    returns: np.ndarray  # Return (%) of each run
+    drawdowns: np.ndarray  # Max drawdown (fraction of the peak) of each run
+
+    def summary(self) -> pd.DataFrame:
+        """Mean, standard deviation and percentiles of returns and drawdowns."""
+        runs = pd.DataFrame({'Return (%)': self.returns, 'Max drawdown (%)': self.drawdowns * 100})
+        return runs.describe(percentiles=[0.05, 0.25, 0.5, 0.75, 0.95]).T
+
+    def percentile(self, value: float) -> float:
+        """Share of runs (%) with a return below value, e.g. where the strategy return falls among random baselines."""
+        return float(np.mean(self.returns < value) * 100)
+
+
+@dataclass
+class DelayedStrategy(TradingStrategy):
+    """Wrapper that delays every signal of a strategy by a random number of candlesticks, between 0 and max_delay."""
+
+    strategy: TradingStrategy
+    max_delay: int = 3
+    seed: Optional[int] = None
+
+    def __post_init__(self) -> None:
+        self.rng = np.random.default_rng(self.seed)
+        self.pending: list[list] = []  # Candlesticks left and signal
+
+    def get_lookback(self) -> int:
+        return self.strategy.get_lookback()
+
+    def __str__(self) -> str:
+        return f'{str(self.strategy)} delayed up to {self.max_delay} periods'
+
+    def signal(self, data: pd.DataFrame) -> str:
+        signal = self.strategy.signal(data)
+        if signal:
+            self.pending.append([int(self.rng.integers(self.max_delay + 1)), signal])
+        due = [signal for delay, signal in self.pending if delay <= 0]
+        self.pending = [[delay - 1, signal] for delay, signal in self.pending if delay > 0]
+        return due[-1] if due else ''  # Latest signal wins if several are due
+
+
+class Robustness:
+    """Run many resampled or randomized variants of a backtest and collect the distributions of return and drawdown.
+    Runs use seeds spawned from one SeedSequence, so results are reproducible for a given seed and number of runs.
+    make_backtest builds the Backtest once per process, with processes > 1 it must be a module level function."""
+
+    def __init__(self, make_backtest: Callable[[], Backtest], data: pd.DataFrame, runs: int = 1000, seed: Optional[int] = None,
+                 processes: int = 1) -> None:
+        self.make_backtest = make_backtest
+        self.data = data
+        self.runs = runs
+        self.seed_sequence = np.random.SeedSequence(seed)  # Its entropy reproduces a run made without a seed
+        self.processes = processes
+
+    def block_bootstrap(self, block_size: int = 24) -> RobustnessResult:
+        """Backtest the strategy on price paths rebuilt from blocks of candlestick returns drawn with replacement."""
+        return self._run('bootstrap', {'block_size': block_size})
+
+    def entry_delay(self, max_delay: int = 3) -> RobustnessResult:
+        """Backtest the strategy with every signal executed up to max_delay candlesticks late."""
+        return self._run('delay', {'max_delay': max_delay})
+
+    def random_baseline(self, upper: int = 75, lower: int = 25, vectorized: bool = True) -> RobustnessResult:
+        """Backtest RandomStrategy, all runs at once with numpy if vectorized, as a baseline for the strategy return."""
+        if not vectorized:
+            return self._run('random', {'upper': upper, 'lower': lower})
+        backtest = self.make_backtest()
+        return _random_baseline(backtest, self.data, _seeds(self.seed_sequence, self.runs), upper, lower)
+
+    def _run(self, kind: str, params: dict) -> RobustnessResult:
+        """Run every variant, in this process or across a process pool."""
+        tasks = [(kind, params, seed) for seed in _seeds(self.seed_sequence, self.runs)]
+        if self.processes <= 1:
+            _init_worker(self.make_backtest, self.data)
+            results = [_run_variant(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(self.processes, initializer=_init_worker, initargs=(self.make_backtest, self.data)) as pool:
+                results = list(pool.map(_run_variant, tasks, chunksize=max(1, self.runs // (4 * self.processes))))
+        returns, drawdowns = zip(*results)
+        return RobustnessResult(kind, np.array(returns), np.array(drawdowns))
+
+
+def block_bootstrap(data: pd.DataFrame, block_size: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Candlesticks with the same times as data and prices rebuilt from blocks of its returns, drawn with replacement.
+    Open, high, low and close are resampled as ratios to the previous close, so every candlestick stays consistent."""
+    size = len(data)
+    block_size = min(block_size, size)
+    prices = data[['Open price', 'Close price', 'High price', 'Low price']].to_numpy(dtype=float)
+    previous_close = np.r_[prices[0, 0], prices[:-1, 1]]
+    ratios = prices / previous_close[:, None]
+    starts = rng.integers(size - block_size + 1, size=-(-size // block_size))
+    rows = (starts[:, None] + np.arange(block_size)).ravel()[:size]
+    closes = prices[0, 0] * np.cumprod(ratios[rows, 1])
+    prices = ratios[rows] * np.r_[prices[0, 0], closes[:-1]][:, None]
+    sample = data.copy()
+    sample[['Open price', 'Close price', 'High price', 'Low price']] = prices
+    sample[['Base asset volume', 'Number of trades']] = data[['Base asset volume', 'Number of trades']].to_numpy()[rows]
+    return sample
+
+
+def _seeds(seed_sequence: np.random.SeedSequence, runs: int) -> list[int]:
+    """Independent integer seeds of each run, the same on every call (spawn advances the sequence, so a copy is spawned)."""
+    children = np.random.SeedSequence(seed_sequence.entropy).spawn(runs)
+    return [int(child.generate_state(1)[0]) for child in children]
+
+
+def _init_worker(make_backtest: Callable[[], Backtest], data: pd.DataFrame) -> None:
+    """Build the backtest reused by every run of this process."""
+    global _BACKTEST, _DATA
+    with contextlib.redirect_stdout(None):
+        _BACKTEST = make_backtest()
+    _DATA = data
+
+
+def _run_variant(task: tuple[str, dict, int]) -> tuple[float, float]:
+    """Return and max drawdown of one run."""
+    kind, params, seed = task
+    backtest, data = _BACKTEST, _DATA
+    strategy = backtest.tradingbot.strategy
+    backtest.reset()
+    if kind == 'bootstrap':
+        data = block_bootstrap(data, params['block_size'], np.random.default_rng(seed))
+    elif kind == 'delay':
+        backtest.tradingbot.strategy = DelayedStrategy(strategy, params['max_delay'], seed)
+    elif kind == 'random':
+        backtest.tradingbot.strategy = RandomStrategy(params['upper'], params['lower'], seed)
+    try:
+        with contextlib.redirect_stdout(None):  # Order messages of thousands of runs
+            backtest._simulate(data)
+    finally:
+        backtest.tradingbot.strategy = strategy
+    return backtest.metrics['return_pct'], backtest.metrics['max_drawdown']
+
+
+def _random_baseline(backtest: Backtest, data: pd.DataFrame, seeds: list[int], upper: int, lower: int) -> RobustnessResult:
+    """RandomStrategy runs simulated together, one numpy step per candlestick for all runs.
+    Follows the paper trading rules of the backtest, so each run matches Backtest with RandomStrategy(upper, lower, seed)."""
+    bot, account = backtest.tradingbot, backtest.tradingbot.account
+    with contextlib.redirect_stdout(None):
+        backtest.reset()
+    commission = backtest._get_commission()
+    fill_model = bot.exchange.fill_model or FixedBpsFill(bps=0.0)
+    closes = data['Close price'].to_numpy(dtype=float)
+    buy_prices = fill_model.fill_prices('BUY', bot.order_size, closes, data)
+    sell_prices = fill_model.fill_prices('SELL', bot.order_size, closes, data)
+    qty = float(str(bot.order_size))
+    first, last = RandomStrategy().get_lookback(), len(data) - 1
+    draws = np.array([np.random.default_rng(seed).integers(100, size=max(last - first, 0)) for seed in seeds]).reshape(len(seeds), -1)
+
+    position = np.full(len(seeds), account.position, dtype=float)
+    cash = np.full(len(seeds), account.cash_position, dtype=float)
+    commissions = np.full(len(seeds), account.commissions, dtype=float)
+    init_wealth = cash + position * data['Open price'].iloc[0] - commissions
+    peak = np.full(len(seeds), -np.inf)
+    drawdown = np.zeros(len(seeds))
+    for step, row in enumerate(range(first, last)):
+        buy_price, sell_price = buy_prices[row], sell_prices[row]
+        buy = (draws[:, step] < lower) & (buy_price * qty > 10) & (cash >= qty * buy_price)
+        sell = (draws[:, step] > upper) & (sell_price * qty > 10) & (position >= qty)
+        position += qty * (buy.astype(float) - sell)
+        cash += qty * (sell * sell_price - buy * buy_price)
+        commissions += np.where(buy, qty * buy_price * commission, 0.0) + np.where(sell, qty * sell_price * commission, 0.0)
+        equity = cash + position * closes[row] - commissions
+        peak = np.maximum(peak, equity)
+        drawdown = np.maximum(drawdown, 1 - equity / peak)
+    final_wealth = cash + position * closes[-1] - commissions
+    return RobustnessResult('random', (final_wealth / init_wealth - 1) * 100, drawdown)
@@ -0,0 +1,155 @@
+"""Request Scheduler"""
+
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Optional
+
+from binance.error import ClientError
+
+PRIORITY_ORDER = 0
+PRIORITY_ACCOUNT = 1
+PRIORITY_DATA = 2
+
+# Request weight, priority and whether identical in-flight requests are coalesced, by client method name
+REQUESTS: dict[str, tuple[int, int, bool]] = {
+    'new_order': (1, PRIORITY_ORDER, False),
+    'new_oco_order': (1, PRIORITY_ORDER, False),
+    'cancel_order': (1, PRIORITY_ORDER, False),
+    'account': (20, PRIORITY_ACCOUNT, True),
+    'trade_fee': (1, PRIORITY_ACCOUNT, True),
+    'get_order': (4, PRIORITY_ACCOUNT, True),
+    'ticker_price': (2, PRIORITY_DATA, True),
+    'klines': (2, PRIORITY_DATA, True),
+}
+
+
+class RequestScheduler:
+    """Client side scheduler of REST requests that keeps the used request weight below the Binance limit.
+    Requests wait for weight in priority order, so orders go ahead of data fetches. Identical in-flight requests
+    share one response and rate limit errors (429, 418) are retried after the Retry-After header or exponential backoff."""
+
+    def __init__(self, weight_limit: int = 6000, window: float = 60.0, max_retries: int = 5, backoff: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.weight_limit = weight_limit
+        self.window = window
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.clock = clock
+        self._used: deque[tuple[float, int]] = deque()
+        self._used_weight = 0
+        self._waiting: list[tuple[int, int]] = []
+        self._seq = itertools.count()
+        self._blocked_until = 0.0
+        self._inflight: dict[tuple, Future] = {}
+        self._lock = threading.Condition()
+
+    @property
+    def used_weight(self) -> int:
+        """Request weight used in the current window."""
+        with self._lock:
+            self._expire(self.clock())
+            return self._used_weight
+
+    def call(self, func: Callable, *args, **kwargs):
+        """Call client method once there is enough request weight available, return its response."""
+        weight, priority, coalesce = REQUESTS.get(func.__name__, (1, PRIORITY_DATA, False))
+        if not coalesce:
+            return self._send(func, weight, priority, args, kwargs)
+        key = (id(getattr(func, '__self__', None)), func.__name__, args, tuple(sorted(kwargs.items())))
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        if not owner:
+            return future.result()
+        try:
+            future.set_result(self._send(func, weight, priority, args, kwargs))
+        except Exception as error:
+            future.set_exception(error)
+        finally:
+            with self._lock:
+                del self._inflight[key]
+        return future.result()
+
+    async def acall(self, name: str, func: Callable[..., Awaitable], *args, **kwargs):
+        """Await coroutine function of the request name (a client method name in REQUESTS) once there is enough request weight available.
+        Weight is waited for in an executor thread, so the event loop keeps running."""
+        weight, priority, _ = REQUESTS.get(name, (1, PRIORITY_DATA, False))
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.max_retries + 1):
+            await loop.run_in_executor(None, self._acquire, weight, priority)
+            try:
+                return await func(*args, **kwargs)
+            except ClientError as error:
+                self._rate_limited(error, attempt, name)
+        raise RuntimeError('Unreachable')
+
+    def _send(self, func: Callable, weight: int, priority: int, args: tuple, kwargs: dict):
+        """Wait for request weight and call func, retrying rate limit errors."""
+        for attempt in range(self.max_retries + 1):
+            self._acquire(weight, priority)
+            try:
+                return func(*args, **kwargs)
+            except ClientError as error:
+                self._rate_limited(error, attempt, func.__name__)
+        raise RuntimeError('Unreachable')
+
+    def _rate_limited(self, error: ClientError, attempt: int, name: str) -> None:
+        """Stop sending requests until a rate limit error may be retried, raise error if it is not one or retries are used up."""
+        if error.status_code not in (418, 429) or attempt == self.max_retries:
+            raise error
+        from binancetrading.account import log_msg  # Imported here, account imports this module
+        self._block(_retry_after(error.header, self.backoff * 2 ** attempt))
+        log_msg(f'Rate limit reached ({error.status_code}), retrying {name} in {self._blocked_until - self.clock():.1f}s.')
+
+    def _acquire(self, weight: int, priority: int) -> None:
+        """Block until it is this request's turn and its weight fits in the window, then use it."""
+        ticket = (priority, next(self._seq))
+        with self._lock:
+            heapq.heappush(self._waiting, ticket)
+            while True:
+                now = self.clock()
+                self._expire(now)
+                if self._waiting[0] == ticket and now >= self._blocked_until and self._used_weight + weight <= self.weight_limit:
+                    break
+                self._lock.wait(timeout=self._wait_time(now))
+            heapq.heappop(self._waiting)
+            self._used.append((now, weight))
+            self._used_weight += weight
+            self._lock.notify_all()
+
+    def _expire(self, now: float) -> None:
+        """Drop requests older than the window."""
+        while self._used and self._used[0][0] <= now - self.window:
+            self._used_weight -= self._used.popleft()[1]
+
+    def _wait_time(self, now: float) -> float:
+        """Time until weight frees up or the backoff ends."""
+        if now < self._blocked_until:
+            return self._blocked_until - now
+        if self._used:
+            return max(self._used[0][0] + self.window - now, 0.001)
+        return 0.1
+
+    def _block(self, delay: float) -> None:
+        """Stop sending requests for delay seconds."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, self.clock() + delay)
+            self._lock.notify_all()
+
+
+def _retry_after(header: Optional[dict], default: float) -> float:
+    """Seconds to wait from the Retry-After response header."""
+    try:
+        return float(header['Retry-After'])
+    except (KeyError, TypeError, ValueError):
+        return default
+
+
+DEFAULT_SCHEDULER = RequestScheduler()
@@ -3,6 +3,7 @@
 
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
+from typing import Optional
 
 import numpy as np
 import pandas as pd
@@ -150,6 +151,10 @@ class RandomStrategy(TradingStrategy):
 
     upper: int = 75
     lower: int = 25
+    seed: Optional[int] = None
+
+    def __post_init__(self) -> None:
+        self.rng = np.random.default_rng(self.seed)
 
     def get_lookback(self) -> int:
         return 5
@@ -158,7 +163,7 @@ class RandomStrategy(TradingStrategy):
         return f'Random Strategy (upper={self.upper}, lower={self.lower})'
 
     def signal(self, data: pd.DataFrame) -> str:
-        signal = np.random.randint(100)
+        signal = self.rng.integers(100)
         if signal < self.lower:
             return 'BUY'
         elif signal > self.upper:
@@ -1,12 +1,19 @@
 
 """Trading Bot Class"""
 
+import os
+import threading
+import time
 from dataclasses import dataclass
+from typing import Optional
 
 import pandas as pd
 
 from binancetrading.account import Account, log_msg
-from binancetrading.exchange import Exchange, _candle_list_to_df, _refresh_candles
+from binancetrading.bus import CandleBusReader
+from binancetrading.candles import CandleBuffer, Kline, KlineDecoder, _kline_from_dict
+from binancetrading.checkpoint import load_checkpoint, save_checkpoint
+from binancetrading.exchange import Exchange, _interval_ms
 from binancetrading.strategies import TradingStrategy
 
 
@@ -24,46 +31,149 @@ class TradingBot:
     profit: float
     loss: float
     verbose: bool = False
+    checkpoint: Optional[str] = None
+    checkpoint_every: int = 1
+    bus: bool = False
 
     def __post_init__(self) -> None:
         self.symbol = self.coin + 'USDT'
-        self.candle_list = self.exchange._init_candles(self.symbol, self.interval, self.strategy.get_lookback())
-        self.candle_df = _candle_list_to_df(self.candle_list)
+        self.candles = CandleBuffer(self.symbol, self.interval)
+        self.decoder = KlineDecoder()
+        self.restored = self.checkpoint is not None and os.path.exists(self.checkpoint)
+        self._candles_since_checkpoint = 0
+        self.bus_reader = CandleBusReader(self.symbol, self.interval) if self.bus else None
+        if self.restored:
+            self._restore_checkpoint()
+        if self.bus_reader is not None:  # History comes from the bus ring buffer, not REST
+            for kline in self.bus_reader.poll():
+                self.candles.append(kline)
+        elif not self.restored:
+            for kline in self.exchange._init_candles(self.symbol, self.interval, self.strategy.get_lookback()):
+                self.candles.append_kline(kline)
+        self.candle_df = self.candles.to_df()
 
-    def execute_strategy(self, data: pd.DataFrame) -> str:
-        """Check if there is buy/sell signal and execute it."""
+    def execute_strategy(self, data: pd.DataFrame, fill_prices: Optional[dict[str, float]] = None, commission: Optional[float] = None) -> str:
+        """Check if there is buy/sell signal and execute it. Paper orders are filled at fill_prices[signal] if given.
+        The trading fee is fetched from Binance unless commission is given."""
         signal = self.strategy.signal(data)
         if signal:
-            self.exchange.execute_order(self.account, self.symbol, signal, self.order_size, self.exchange._get_commission(self.account, self.symbol), self.account.paper_trade)
+            price = fill_prices.get(signal) if fill_prices else None
+            if commission is None:
+                commission = self.exchange._get_commission(self.account, self.symbol)
+            self.exchange.execute_order(self.account, self.symbol, signal, self.order_size, commission, self.account.paper_trade, price=price, data=data)
         else:
             log_msg('No order was placed.')
         return signal
 
+    def save_checkpoint(self) -> None:
+        """Snapshot candlesticks, positions, trades and open live orders to the checkpoint file."""
+        meta = {'symbol': self.symbol, 'interval': self.interval, 'strategy': str(self.strategy)}
+        save_checkpoint(self.checkpoint, meta, self.candles, self.account, self.exchange.live_orders)
+        self._candles_since_checkpoint = 0
+
+    def _restore_checkpoint(self) -> None:
+        """Load state from the checkpoint file and backfill the candlesticks closed since it was written."""
+        snapshot = load_checkpoint(self.checkpoint)
+        if (snapshot.meta['symbol'], snapshot.meta['interval']) != (self.symbol, self.interval):
+            raise ValueError(f'Checkpoint {self.checkpoint} is for {snapshot.meta["symbol"]} {snapshot.meta["interval"]}, not {self.symbol} {self.interval}.')
+        snapshot.restore(self.candles, self.account, self.exchange.live_orders)
+        step = _interval_ms(self.interval)
+        if step and self.candles:
+            missing = self.exchange._backfill_candles(self.symbol, self.interval, self.candles.last_open_time + step, int(time.time() * 1000) - step)
+            for kline in missing:
+                self.candles.append_kline(kline)
+            log_msg(f'Restored {len(self.candles)} candlesticks, {len(self.account.trades)} trades and {len(self.exchange.live_orders)} open orders '
+                    f'from {self.checkpoint}, backfilled {len(missing)}.', verb=True)
+
     def _ws_handler(self, msg: dict) -> None:
-        """Function to handle incoming WebSocket candlestick data and pass it to the strategy."""
-        try:
-            self.candle_list, changed = _refresh_candles(msg, self.candle_list)
-            if changed:
-                self.candle_df = _candle_list_to_df(self.candle_list)
-                exit_signal, reason = self.account._check_profit_loss(self.symbol, self.profit, self.loss)
-                if exit_signal:
-                    if reason == 'Loss':
-                        self.exchange.exit_positions(self.account, self.symbol, self.account.paper_trade)
-                    self.exchange.event.set()  # Terminate trading session
-                else:
-                    _ = self.execute_strategy(self.candle_df)
-        except KeyError:
-            if msg == {'result': None, 'id': 1}:
-                pass
-            else:
-                print(msg)
+        """Function to handle WebSocket candlestick data parsed by the connector and pass it to the strategy."""
+        if 'k' not in msg:
+            if msg != {'result': None, 'id': 1}:
+                log_msg(f'Ignored WebSocket message: {msg}')
+            return
+        if msg['k']['x']:  # Updates of the open candlestick are skipped
+            self._on_candle(_kline_from_dict(msg['k']))
+
+    def _ws_raw_handler(self, raw: bytes) -> None:
+        """Function to handle raw kline messages, decoded straight into numeric candlesticks, other messages are ignored."""
+        kline = self.decoder.decode(raw)
+        if kline is not None:
+            self._on_candle(kline)
+
+    def _on_candle(self, kline: Kline) -> None:
+        """Store closed candlestick and run the strategy if it is new."""
+        if self.candles:
+            self._backfill_gap(kline.open_time)
+        if self.candles.append(kline):
+            self.candle_df = self.candles.to_df()
+            if self.account.paper_trade:
+                self._match_paper_orders(kline)
+            else:  # Book fills of resting live orders before valuing positions
+                self.exchange.reconcile_orders(self.account)
+            exit_signal, reason = self.account._check_profit_loss(self.symbol, self.profit, self.loss)
+            if exit_signal:
+                if reason == 'Loss':
+                    self.exchange.exit_positions(self.account, self.symbol, self.account.paper_trade)
                 self.exchange.event.set()  # Terminate trading session
+            else:
+                _ = self.execute_strategy(self.candle_df)
+            self._candles_since_checkpoint += 1
+            if self.checkpoint and self._candles_since_checkpoint >= self.checkpoint_every:
+                self.save_checkpoint()
 
-    def run(self) -> None:
-        """Initialize portfolio, connecto to WebSocket and run strategy."""
+    def _backfill_gap(self, open_time: int) -> None:
+        """Fetch over REST the candlesticks missed between the last stored one and a new closed candlestick."""
+        step = _interval_ms(self.interval)
+        start_time = self.candles.last_open_time + step
+        if not step or open_time <= start_time:
+            return
+        missing = self.exchange._backfill_candles(self.symbol, self.interval, start_time, open_time - 1)
+        log_msg(f'Backfilled {len(missing)} missed candlesticks.', verb=True)
+        for kline in map(_kline_from_dict, missing):
+            if self.candles.append(kline) and self.account.paper_trade:
+                self._match_paper_orders(kline)
+
+    def _match_paper_orders(self, kline: Kline) -> None:
+        """Match resting paper orders against a candlestick."""
+        self.exchange._match_paper_orders(self.account, self.symbol, kline.open, kline.high, kline.low)
+
+    def run(self, chart: bool = False) -> None:
+        """Initialize portfolio, connecto to WebSocket and run strategy.
+        If chart, the session runs in a background thread while a live chart of the bot candlesticks and trades is shown.
+        With a checkpoint file, state is saved every checkpoint_every candlesticks and at the end of the session.
+        With bus, candlesticks are read from the shared memory of a CandleBusPublisher process instead of a WebSocket."""
         log_msg(f'Running {self.strategy}', verb=True)
         log_msg(f'Symbol: {self.symbol}\nInterval: {self.interval}\nOrdersize: {self.order_size}\nDuration: {self.duration}')
         log_msg(f'Take profit: {self.profit}%\nStop loss: {self.loss}%')
-        self.account._set_positions(self.coin, self.account.paper_position, self.account.paper_cash_position)
-        self.account._value_positions(self.symbol, init=True)
-        self.exchange._connect_ws(self.account, self._ws_handler, self.symbol, self.interval, self.duration)
+        if self.restored:  # Keep restored positions and initial wealth so profit and loss targets carry over
+            self.account._value_positions(self.symbol)
+        else:
+            self.account._set_positions(self.coin, self.account.paper_position, self.account.paper_cash_position)
+            self.account._value_positions(self.symbol, init=True)
+        if not chart:
+            self._connect()
+        else:
+            self._run_with_chart()
+        if self.checkpoint:
+            self.save_checkpoint()
+
+    def _connect(self) -> None:
+        """Run session on the shared memory bus if enabled, else on a WebSocket.
+        If the bus publisher goes down, the rest of the session runs on the bot's own WebSocket."""
+        duration = self.duration
+        if self.bus_reader is not None:
+            if self.exchange._connect_bus(self.account, self._on_candle, self.bus_reader, self.symbol, duration):
+                return
+            self.bus_reader = None
+            duration = self.exchange.connection.remaining
+            log_msg('Falling back to a WebSocket connection.', verb=True)
+        self.exchange._connect_ws(self.account, self._ws_handler, self.symbol, self.interval, duration, raw_handler=self._ws_raw_handler)
+
+    def _run_with_chart(self) -> None:
+        """Run session in a background thread while showing a live chart of the bot candlesticks and trades."""
+        from binancetrading.chart import LiveChart
+        session = threading.Thread(target=self._connect)
+        session.start()
+        LiveChart([self.symbol], self.interval, candles={self.symbol: self.candles}, trades=self.account.trades).show()
+        self.exchange.event.set()  # Closing the chart ends the session
+        session.join()
@@ -0,0 +1,33 @@
+########################################
+# Example Import Time Benchmark Script #
+########################################
+
+import statistics
+import subprocess
+import sys
+
+RUNS = 10
+
+IMPORTS = {
+    'Package': 'import binancetrading',
+    'Headless bot': 'from binancetrading import Account, Exchange, TradingBot, strategies',
+    'Backtest': 'from binancetrading import Backtest',
+    'Backtest with plots': 'from binancetrading import Backtest; import matplotlib.pyplot',
+}
+
+
+def import_time(statement: str) -> tuple[float, bool]:
+    """Median seconds to run import statement in a fresh interpreter and whether it loaded matplotlib."""
+    code = f'import sys, time; t = time.perf_counter(); {statement}; print(time.perf_counter() - t, "matplotlib" in sys.modules)'
+    times, plots = [], False
+    for _ in range(RUNS):
+        seconds, plots = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout.split()
+        times.append(float(seconds))
+    return statistics.median(times), plots == 'True'
+
+
+if __name__ == '__main__':
+    print(f'\nImport time benchmark, median of {RUNS} runs\n')
+    for name, statement in IMPORTS.items():
+        seconds, plots = import_time(statement)
+        print(f'{name:<20} {seconds * 1000:>8.1f} ms   matplotlib loaded: {plots}')
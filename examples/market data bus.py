@@ -0,0 +1,23 @@
+##################################
+# Example Market Data Bus Script #
+##################################
+
+import binancetrading as bt
+from binancetrading.bus import CandleBusPublisher
+
+COINS = ['BTC', 'ETH']
+INTERVAL = '1m'
+
+
+def main() -> None:
+    """Publish candlesticks to shared memory, start bots in other processes with bus=True to read them."""
+
+    # In each bot process:
+    # tradebot = bt.TradingBot(account, exchange, strategy, 'BTC', order_size, INTERVAL, duration, profit, loss, bus=True)
+    publisher = CandleBusPublisher(bt.Exchange(), COINS, INTERVAL)
+    publisher.run()
+
+
+if __name__ == '__main__':
+    print('\nMarket data bus example\n')
+    main()